@@ -1,7 +1,6 @@
 """
 Data Loading and Preprocessing for Psych-101 Dataset
 """
-import pandas as pd
 import numpy as np
 import re
 import logging
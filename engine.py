@@ -0,0 +1,92 @@
+"""
+Engine assembly - one HDC core, vector store, reasoning engine and query
+processor shared by the web app and batch jobs
+"""
+import os
+import argparse
+from typing import Dict, Any, Optional
+from hdc_core import HDCCore
+from vector_store import VectorStore, VECTOR_DTYPES
+from reasoning_engine import ReasoningEngine
+from query_processor import QueryProcessor
+
+DEFAULT_STORAGE_PATH = os.environ.get('HYPERCENTAUR_STORE', 'vector_store.pkl')
+# Memory-map the vector matrix so every worker process shares one copy
+DEFAULT_MMAP_VECTORS = os.environ.get('HYPERCENTAUR_MMAP', '0').lower() in ('1', 'true', 'yes')
+# Array backend for batch scoring: numpy, or torch when installed (see hdc_backends.py)
+DEFAULT_HDC_BACKEND = os.environ.get('HYPERCENTAUR_HDC_BACKEND', 'numpy')
+# Storage dtype of item vectors ('auto' = smallest exact integer type, see vector_store.py)
+DEFAULT_VECTOR_DTYPE = os.environ.get('HYPERCENTAUR_VECTOR_DTYPE', 'auto')
+# Answer retrieval: 'lexical' text matching or 'hybrid' lexical + HDC fusion
+DEFAULT_RETRIEVAL_MODE = os.environ.get('HYPERCENTAUR_RETRIEVAL', 'lexical')
+# .npz cache of the encoded reasoning patterns; unset = re-encode on every start
+DEFAULT_PATTERN_CACHE = os.environ.get('HYPERCENTAUR_PATTERN_CACHE') or None
+
+class TutorEngine:
+    def __init__(self, storage_path: str = DEFAULT_STORAGE_PATH, dim: int = 10000,
+                 mmap_vectors: bool = DEFAULT_MMAP_VECTORS, backend: str = DEFAULT_HDC_BACKEND,
+                 vector_dtype: str = DEFAULT_VECTOR_DTYPE, retrieval_mode: str = DEFAULT_RETRIEVAL_MODE,
+                 pattern_cache_path: Optional[str] = DEFAULT_PATTERN_CACHE, record_history: bool = True):
+        self.hdc = HDCCore(dim=dim, backend=backend)
+        self.vector_store = VectorStore(self.hdc, storage_path, mmap_vectors=mmap_vectors,
+                                        vector_dtype=vector_dtype)
+        self.reasoning_engine = ReasoningEngine(self.hdc, pattern_cache_path)
+        self.query_processor = QueryProcessor(self.hdc, self.vector_store, self.reasoning_engine,
+                                              retrieval_mode=retrieval_mode,
+                                              record_history=record_history)
+    
+    def is_empty(self) -> bool:
+        """True when no prebuilt store was found at storage_path"""
+        return not self.vector_store.metadata
+    
+    def build_knowledge_base(self) -> int:
+        """Load, preprocess and store the psychology dataset (persists to disk)"""
+        from data_loader import DataLoader
+        
+        loader = DataLoader()
+        loader.load_psych_dataset()
+        processed = loader.preprocess_data()
+        
+        self.vector_store.clear_storage()
+        return self.vector_store.store_data(processed)
+    
+    def process_query(self, query: str) -> Dict[str, Any]:
+        """Answer a query through the QueryProcessor"""
+        return self.query_processor.process_query(query)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get knowledge base statistics"""
+        return self.vector_store.get_stats()
+
+def load_engine(storage_path: str = DEFAULT_STORAGE_PATH, build_if_missing: bool = True,
+                mmap_vectors: bool = DEFAULT_MMAP_VECTORS, backend: str = DEFAULT_HDC_BACKEND,
+                pattern_cache_path: Optional[str] = DEFAULT_PATTERN_CACHE,
+                record_history: bool = True) -> TutorEngine:
+    """Load the prebuilt store; build and persist it only if none exists yet"""
+    engine = TutorEngine(storage_path, mmap_vectors=mmap_vectors, backend=backend,
+                         pattern_cache_path=pattern_cache_path, record_history=record_history)
+    
+    if engine.is_empty() and build_if_missing:
+        print(f"No vector store at {storage_path}, building it...")
+        engine.build_knowledge_base()
+    
+    return engine
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prebuild the persisted vector store")
+    parser.add_argument('--store', default=DEFAULT_STORAGE_PATH, help="vector store path")
+    parser.add_argument('--mmap', action='store_true', default=DEFAULT_MMAP_VECTORS,
+                        help="save the vector matrix as a shared memory-mapped .npy file")
+    parser.add_argument('--dtype', default=DEFAULT_VECTOR_DTYPE, choices=VECTOR_DTYPES,
+                        help="storage dtype of item vectors")
+    parser.add_argument('--patterns', default=DEFAULT_PATTERN_CACHE,
+                        help="also write the reasoning pattern cache to this .npz path")
+    args = parser.parse_args()
+    
+    engine = TutorEngine(args.store, mmap_vectors=args.mmap, vector_dtype=args.dtype,
+                         pattern_cache_path=args.patterns)
+    count = engine.build_knowledge_base()
+    print(f"Built {args.store} with {count} items")
+    if args.patterns:
+        engine.reasoning_engine.build_pattern_cache()
+        print(f"Built {args.patterns}")
@@ -0,0 +1,201 @@
+"""
+Array backends for HDC operations
+
+The core engine only needs NumPy. Other backends are registered by name and
+imported the first time they are requested, so their dependencies stay optional.
+"""
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+# Compact storage dtypes; products over them are widened block by block
+COMPACT_DTYPES = (np.dtype(np.int8), np.dtype(np.int16), np.dtype(np.float16))
+BLOCK_ROWS = 1024
+
+def accumulator_dtype(queries: np.ndarray, matrix: np.ndarray) -> np.dtype:
+    """Dtype for dot products against a compact matrix
+    
+    float32 (BLAS-friendly) when every partial sum of integer data stays below
+    2**24 and is therefore exact, float64 otherwise.
+    """
+    if matrix.dtype.kind == 'f':
+        return np.dtype(np.float64) if queries.dtype == np.float64 else np.dtype(np.float32)
+    if queries.dtype.kind == 'f' and not np.array_equal(queries, np.round(queries)):
+        return np.dtype(np.float64)
+    
+    max_product = float(np.abs(queries).max(initial=0)) * (np.iinfo(matrix.dtype).max + 1)
+    if max_product * matrix.shape[-1] < 2 ** 24:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+class NumpyBackend:
+    """Default backend: plain NumPy on the caller's arrays"""
+    
+    name = "numpy"
+    
+    def __init__(self, device: str = "cpu"):
+        self.device = device  # NumPy always runs on the CPU
+    
+    def bind(self, vec1: np.ndarray, vec2: np.ndarray) -> np.ndarray:
+        """Element-wise multiplication"""
+        return vec1 * vec2
+    
+    def bundle(self, vectors: List[np.ndarray], dim: int) -> np.ndarray:
+        """Element-wise sum thresholded back to bipolar"""
+        if not vectors:
+            return np.zeros(dim)
+        
+        result = np.sum(vectors, axis=0)
+        return np.where(result > 0, 1, -1)
+    
+    def batch_similarity(self, query: np.ndarray, matrix: np.ndarray,
+                         row_norms: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity between a query and every row of a matrix"""
+        if len(matrix) == 0:
+            return np.zeros(0)
+        
+        if row_norms is None:
+            row_norms = np.linalg.norm(matrix, axis=1)
+        
+        norms = row_norms * np.linalg.norm(query)
+        dot_products = self.dot(query, matrix)
+        
+        # Zero vectors have no direction; score them 0 like HDCCore.similarity()
+        safe_norms = np.where(norms > 0, norms, 1.0)
+        return np.where(norms > 0, dot_products / safe_norms, 0.0)
+    
+    def batch_hamming_similarity(self, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Normalized Hamming similarity between a query and every row of a matrix"""
+        if len(matrix) == 0 or matrix.shape[1] != len(query):
+            return np.zeros(len(matrix))
+        
+        query = self._compact_query(query, matrix)
+        return np.count_nonzero(matrix == query, axis=1) / len(query)
+    
+    def _compact_query(self, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Query in the matrix dtype (e.g. int8) when it fits exactly, so
+        comparisons run without widening the matrix"""
+        if matrix.dtype in COMPACT_DTYPES:
+            compact_query = query.astype(matrix.dtype)
+            if np.array_equal(compact_query, query):
+                return compact_query
+        return query
+    
+    def dot(self, queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Dot products of one query (1-D) or many (2-D) with every matrix row"""
+        if matrix.dtype in COMPACT_DTYPES:
+            return self._compact_dot(queries, matrix)
+        
+        if queries.ndim == 1:
+            return matrix @ queries
+        return queries @ matrix.T
+    
+    def _compact_dot(self, queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """dot() for compact matrices: widen one block of rows at a time
+        
+        A product in the storage dtype itself would overflow (int8 @ int8 wraps).
+        """
+        dtype = accumulator_dtype(queries, matrix)
+        queries = queries.astype(dtype)
+        result = np.empty(queries.shape[:-1] + (len(matrix),), dtype=dtype)
+        
+        for start in range(0, len(matrix), BLOCK_ROWS):
+            block = matrix[start:start + BLOCK_ROWS].astype(dtype)
+            if queries.ndim == 1:
+                result[start:start + len(block)] = block @ queries
+            else:
+                result[:, start:start + len(block)] = queries @ block.T
+        return result
+    
+    def row_norms(self, matrix: np.ndarray) -> np.ndarray:
+        """Euclidean norm of every matrix row, accumulated in float64"""
+        if matrix.dtype in COMPACT_DTYPES:
+            return np.sqrt(np.einsum('ij,ij->i', matrix, matrix, dtype=np.float64))
+        return np.linalg.norm(matrix, axis=1)
+
+class TorchBackend(NumpyBackend):
+    """PyTorch backend for batch scoring (multi-threaded matmul on CPU or GPU)
+    
+    Takes and returns NumPy arrays. Cosine scoring reuses NumpyBackend on top
+    of the tensor dot(). Single-vector bind/bundle stay on NumPy, where
+    converting to tensors would cost more than the operation itself.
+    """
+    
+    name = "torch"
+    
+    def __init__(self, device: str = "cpu"):
+        import torch  # Optional dependency, see requirements-extras.txt
+        
+        self.torch = torch
+        self.device = torch.device(device)
+    
+    def _tensor(self, array: np.ndarray, dtype: Optional[np.dtype] = None):
+        """Tensor copy of a (small) array on the backend device"""
+        return self.torch.from_numpy(np.array(array, dtype=dtype)).to(self.device)
+    
+    def _blocks(self, matrix: np.ndarray, dtype: np.dtype):
+        """(first row, tensor) per BLOCK_ROWS rows, converted one block at a time
+        
+        The stored matrix is often read-only (snapshots, memmaps) and compact
+        (int8); converting it whole would allocate several times its size on
+        every call, so only one widened block exists at any time.
+        """
+        for start in range(0, len(matrix), BLOCK_ROWS):
+            yield start, self._tensor(matrix[start:start + BLOCK_ROWS], dtype)
+    
+    def batch_hamming_similarity(self, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Normalized Hamming similarity between a query and every row of a matrix"""
+        if len(matrix) == 0 or matrix.shape[1] != len(query):
+            return np.zeros(len(matrix))
+        
+        query = self._compact_query(query, matrix)
+        dtype = np.result_type(query, matrix)
+        query_t = self._tensor(query, dtype)
+        
+        matches = np.empty(len(matrix), dtype=np.int64)
+        for start, block_t in self._blocks(matrix, dtype):
+            block_matches = self.torch.count_nonzero(block_t == query_t, dim=1)
+            matches[start:start + len(block_t)] = block_matches.cpu().numpy()
+        return matches / len(query)
+    
+    def dot(self, queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Dot products of one query (1-D) or many (2-D) with every matrix row"""
+        if matrix.dtype in COMPACT_DTYPES:
+            dtype = accumulator_dtype(queries, matrix)  # No int8/float16 overflow
+        else:
+            dtype = np.result_type(queries, matrix)
+        queries_t = self._tensor(queries, dtype)
+        result = np.empty(queries.shape[:-1] + (len(matrix),), dtype=dtype)
+        
+        for start, block_t in self._blocks(matrix, dtype):
+            stop = start + len(block_t)
+            if queries.ndim == 1:
+                result[start:stop] = self.torch.mv(block_t, queries_t).cpu().numpy()
+            else:
+                result[:, start:stop] = self.torch.matmul(queries_t, block_t.T).cpu().numpy()
+        return result
+
+# Backend name -> factory taking a device; factories import their own dependencies
+_BACKEND_FACTORIES: Dict[str, Callable[[str], object]] = {
+    'numpy': NumpyBackend,
+    'torch': TorchBackend,
+}
+_BACKENDS: Dict[tuple, object] = {}  # (name, device) -> instance
+
+def register_backend(name: str, factory: Callable[[str], object]):
+    """Register a backend factory under a name (replaces any existing one)"""
+    _BACKEND_FACTORIES[name] = factory
+    for key in [key for key in _BACKENDS if key[0] == name]:
+        del _BACKENDS[key]
+
+def available_backends() -> List[str]:
+    """Names of all registered backends, whether or not they are loaded yet"""
+    return list(_BACKEND_FACTORIES)
+
+def get_backend(name: str = "numpy", device: str = "cpu"):
+    """Return the shared instance of a backend, creating it on first use"""
+    key = (name, device)
+    if key not in _BACKENDS:
+        if name not in _BACKEND_FACTORIES:
+            raise ValueError(f"Unknown HDC backend '{name}' (available: {', '.join(available_backends())})")
+        _BACKENDS[key] = _BACKEND_FACTORIES[name](device)
+    return _BACKENDS[key]
@@ -2,38 +2,78 @@
 Core Hyperdimensional Computing Operations
 """
 import numpy as np
-import torch
 from typing import Dict, List, Tuple, Optional
 import random
+import zlib
+import threading
+from hdc_backends import get_backend
+
+# Dimensions scored per step by early-terminating (bounded) search
+EARLY_STOP_CHUNK = 1024
+
+def bounded_match_counts(query: np.ndarray, matrix: np.ndarray, min_matches: float = 0.0,
+                         top_k: Optional[int] = None,
+                         chunk_size: int = EARLY_STOP_CHUNK) -> Tuple[np.ndarray, np.ndarray]:
+    """Matching-element counts of bipolar rows, abandoning hopeless rows early
+    
+    Rows are scored chunk_size dimensions at a time. After each chunk a row
+    can end with at most matches + remaining dimensions; rows whose bound is
+    below min_matches, or below the k-th best count seen so far, are dropped.
+    Returns the surviving rows (in order) and their exact full counts, so
+    every row that can still reach min_matches or the top_k is kept.
+    """
+    dim = len(query)
+    rows = np.arange(len(matrix))
+    matches = np.zeros(len(matrix), dtype=np.int64)
+    
+    if matrix.dtype != query.dtype and np.array_equal(query.astype(matrix.dtype), query):
+        query = query.astype(matrix.dtype)
+    
+    for start in range(0, dim, chunk_size):
+        stop = min(start + chunk_size, dim)
+        block = matrix[rows, start:stop] if len(rows) < len(matrix) else matrix[:, start:stop]
+        matches += np.count_nonzero(block == query[start:stop], axis=1)
+        
+        bound = min_matches
+        if top_k and len(rows) > top_k:
+            bound = max(bound, np.partition(matches, len(matches) - top_k)[len(matches) - top_k])
+        
+        keep = matches + (dim - stop) >= bound
+        if not keep.all():
+            rows, matches = rows[keep], matches[keep]
+        if len(rows) == 0:
+            break
+    
+    return rows, matches
 
 class HDCCore:
-    def __init__(self, dim: int = 10000, device: str = "cpu"):
+    def __init__(self, dim: int = 10000, device: str = "cpu", backend: str = "numpy"):
         """
         Initialize HDC with specified dimensions
         """
         self.dim = dim
         self.device = device
+        self.backend = get_backend(backend, device)  # Array backend (numpy, torch)
         self.concept_vectors = {}
+        self._concept_lock = threading.Lock()
         self.memory_bank = {}
+        self.item_memory = ItemMemory(dim, self.backend)  # Stacked copy of memory_bank for recall
         
     def generate_random_vector(self, seed: Optional[int] = None) -> np.ndarray:
         """Generate a random bipolar hypervector"""
-        if seed:
-            np.random.seed(seed)
+        if seed is not None:
+            # Private generator: seeding the global one races between threads.
+            # RandomState draws the same values np.random.seed + choice did
+            return np.random.RandomState(seed).choice([-1, 1], size=self.dim)
         return np.random.choice([-1, 1], size=self.dim)
     
     def bind(self, vec1: np.ndarray, vec2: np.ndarray) -> np.ndarray:
         """Bind two vectors using element-wise multiplication"""
-        return vec1 * vec2
+        return self.backend.bind(vec1, vec2)
     
     def bundle(self, vectors: List[np.ndarray]) -> np.ndarray:
         """Bundle multiple vectors using element-wise addition and thresholding"""
-        if not vectors:
-            return np.zeros(self.dim)
-        
-        result = np.sum(vectors, axis=0)
-        # Threshold to maintain bipolar nature
-        return np.where(result > 0, 1, -1)
+        return self.backend.bundle(vectors, self.dim)
     
     def permute(self, vec: np.ndarray, shift: int = 1) -> np.ndarray:
         """Permute vector by circular shift"""
@@ -44,7 +84,9 @@ class HDCCore:
         if np.allclose(vec1, 0) or np.allclose(vec2, 0):
             return 0.0
         
-        dot_product = np.dot(vec1, vec2)
+        # Accumulate in float64: a dot product of int8/float16 vectors in
+        # their own dtype wraps around or rounds
+        dot_product = np.einsum('i,i->', vec1, vec2, dtype=np.float64)
         norm1 = np.linalg.norm(vec1)
         norm2 = np.linalg.norm(vec2)
         
@@ -63,18 +105,38 @@ class HDCCore:
         total = len(vec1)
         return matches / total
     
+    def batch_similarity(self, query: np.ndarray, matrix: np.ndarray,
+                         row_norms: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity between a query and every row of a matrix"""
+        return self.backend.batch_similarity(query, matrix, row_norms)
+    
+    def batch_hamming_similarity(self, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Normalized Hamming similarity between a query and every row of a matrix"""
+        return self.backend.batch_hamming_similarity(query, matrix)
+    
+    def row_norms(self, matrix: np.ndarray) -> np.ndarray:
+        """Euclidean norm of every row of a matrix"""
+        return self.backend.row_norms(matrix)
+    
+    def batch_dot(self, queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Dot products of one query (1-D) or many (2-D) with every matrix row"""
+        return self.backend.dot(queries, matrix)
+    
     def create_concept_vector(self, concept: str, seed: Optional[int] = None) -> np.ndarray:
         """Create or retrieve a concept vector"""
         if concept in self.concept_vectors:
             return self.concept_vectors[concept]
         
-        # Use concept hash as seed for reproducibility
+        # Use a stable concept hash as seed so vectors match across processes
+        # (built-in hash() of str is salted per process)
         if seed is None:
-            seed = hash(concept) % (2**32)
+            seed = zlib.crc32(concept.encode('utf-8'))
         
         vector = self.generate_random_vector(seed)
-        self.concept_vectors[concept] = vector
-        return vector
+        
+        # Concurrent queries may create the same concept; the first one stored wins
+        with self._concept_lock:
+            return self.concept_vectors.setdefault(concept, vector)
     
     def encode_sequence(self, sequence: List[str]) -> np.ndarray:
         """Encode a sequence using position binding"""
@@ -107,19 +169,14 @@ class HDCCore:
         
         return self.bundle(relation_vectors)
     
-    def query_memory(self, query_vector: np.ndarray, threshold: float = 0.3) -> List[Tuple[str, float]]:
-        """Query memory bank and return similar items"""
-        results = []
-        
-        for key, stored_vector in self.memory_bank.items():
-            similarity = self.hamming_similarity(query_vector, stored_vector)
-            if similarity > threshold:
-                results.append((key, similarity))
-        
-        return sorted(results, key=lambda x: x[1], reverse=True)
+    def query_memory(self, query_vector: np.ndarray, threshold: float = 0.3, top_k: Optional[int] = None,
+                     early_stop: bool = False) -> List[Tuple[str, float]]:
+        """Query memory bank and return similar items (see ItemMemory.recall)"""
+        return self.item_memory.recall(query_vector, threshold, top_k, early_stop)
     
     def store_memory(self, key: str, vector: np.ndarray):
-        """Store a vector in memory bank"""
+        """Store a vector in memory bank (must have length dim)"""
+        self.item_memory.add(key, vector)
         self.memory_bank[key] = vector
     
     def cleanup_memory(self, vector: np.ndarray, candidates: List[np.ndarray]) -> np.ndarray:
@@ -127,13 +184,137 @@ class HDCCore:
         if not candidates:
             return vector
         
-        best_match = candidates[0]
-        best_similarity = self.hamming_similarity(vector, candidates[0])
+        # Candidates of another length score 0, as with hamming_similarity
+        same_length = [i for i, candidate in enumerate(candidates) if len(candidate) == len(vector)]
+        similarities = np.zeros(len(candidates))
+        if same_length:
+            similarities[same_length] = self.batch_hamming_similarity(
+                vector, np.stack([candidates[i] for i in same_length]))
+        
+        # First best candidate wins ties, as with a sequential scan
+        return candidates[int(np.argmax(similarities))]
+    
+    def cleanup_memory_batch(self, vectors: np.ndarray, candidates: List[np.ndarray]) -> np.ndarray:
+        """Clean up many noisy vectors (one per row) against the same candidates
+        
+        Every candidate must have length dim.
+        """
+        if not candidates:
+            return vectors
         
-        for candidate in candidates[1:]:
-            sim = self.hamming_similarity(vector, candidate)
-            if sim > best_similarity:
-                best_similarity = sim
-                best_match = candidate
+        memory = ItemMemory(self.dim, self.backend)
+        for i, candidate in enumerate(candidates):
+            memory.add(i, candidate)
         
-        return best_match
\ No newline at end of file
+        return memory.cleanup_batch(vectors)
+
+class ItemMemory:
+    """Associative item memory with all stored vectors stacked in one matrix
+    
+    Cleanup and thresholded recall are a single vectorized pass over the
+    matrix instead of one hamming_similarity call per stored vector.
+    """
+    
+    def __init__(self, dim: int, backend=None):
+        self.dim = dim
+        self.backend = backend or get_backend()
+        self.keys = []
+        self._rows = {}       # key -> index into self._vectors
+        self._vectors = []
+        self._matrix = None   # Stacked lazily, dropped on every add
+        self._float_matrix = None  # float32 copy of +/-1 data for BLAS products
+        self._bipolar = True  # All stored vectors are +/-1
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def add(self, key, vector: np.ndarray):
+        """Store (or replace) the vector for key"""
+        vector = np.asarray(vector)
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Item memory holds vectors of length {self.dim}, got shape {vector.shape}")
+        if key in self._rows:
+            self._vectors[self._rows[key]] = vector
+        else:
+            self._rows[key] = len(self.keys)
+            self.keys.append(key)
+            self._vectors.append(vector)
+        
+        self._bipolar = self._bipolar and bool(np.all(np.abs(vector) == 1))
+        self._matrix = None
+        self._float_matrix = None
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            if self._vectors:
+                self._matrix = np.stack(self._vectors)
+            else:
+                self._matrix = np.zeros((0, self.dim))
+        return self._matrix
+    
+    def similarities(self, query: np.ndarray) -> np.ndarray:
+        """Hamming similarity of the query to every stored vector"""
+        matrix = self.matrix
+        if len(matrix) == 0 or matrix.shape[1] != len(query):
+            return np.zeros(len(matrix))
+        
+        return np.count_nonzero(matrix == query, axis=1) / len(query)
+    
+    def batch_similarities(self, queries: np.ndarray) -> np.ndarray:
+        """Hamming similarities for many queries at once (queries x stored)"""
+        queries = np.atleast_2d(queries)
+        matrix = self.matrix
+        if len(matrix) == 0 or matrix.shape[1] != queries.shape[1]:
+            return np.zeros((len(queries), len(matrix)))
+        
+        if self._bipolar and np.all(np.abs(queries) == 1):
+            # For +/-1 vectors, matches = (dim + dot) / 2 - one matrix product,
+            # in float32 (exact for these sums) so it runs on BLAS
+            if self._float_matrix is None:
+                self._float_matrix = matrix.astype(np.float32)
+            dots = self.backend.dot(queries.astype(np.float32), self._float_matrix)
+            return (queries.shape[1] + dots.astype(np.float64)) / (2 * queries.shape[1])
+        
+        return np.stack([self.similarities(query) for query in queries])
+    
+    def recall(self, query: np.ndarray, threshold: float = 0.3, top_k: Optional[int] = None,
+               early_stop: bool = False) -> List[Tuple[str, float]]:
+        """Stored keys with similarity above threshold, most similar first
+        
+        top_k limits the result length. With early_stop, bipolar memories are
+        scored in chunks and keys that can no longer pass the threshold or
+        reach the top_k are abandoned; results are the same.
+        """
+        query = np.asarray(query)
+        if early_stop and self._bipolar and len(self.keys) and len(query) == self.dim \
+                and np.all(np.abs(query) == 1):
+            # Half a match of slack keeps float rounding of threshold * dim safe
+            rows, matches = bounded_match_counts(query, self.matrix, threshold * self.dim - 0.5, top_k)
+            similarities = matches / self.dim
+        else:
+            similarities = self.similarities(query)
+            rows = np.arange(len(similarities))
+        
+        hits = np.flatnonzero(similarities > threshold)
+        order = hits[np.argsort(-similarities[hits], kind='stable')][:top_k]
+        return [(self.keys[rows[i]], float(similarities[i])) for i in order]
+    
+    def nearest(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Row index and similarity of the best stored vector for each query"""
+        similarities = self.batch_similarities(queries)
+        rows = np.argmax(similarities, axis=1)
+        return rows, similarities[np.arange(len(rows)), rows]
+    
+    def cleanup(self, vector: np.ndarray) -> np.ndarray:
+        """Replace a noisy vector with the closest stored vector"""
+        if not self.keys:
+            return vector
+        return self.matrix[int(np.argmax(self.similarities(vector)))]
+    
+    def cleanup_batch(self, vectors: np.ndarray) -> np.ndarray:
+        """Clean up many noisy vectors (one per row) in one pass"""
+        if not self.keys:
+            return vectors
+        rows, _ = self.nearest(vectors)
+        return self.matrix[rows]
\ No newline at end of file
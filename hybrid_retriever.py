@@ -0,0 +1,137 @@
+"""
+Hybrid retrieval - lexical candidates from an inverted token index, rescored
+with HDC similarity and merged by reciprocal rank fusion
+"""
+import threading
+import numpy as np
+from typing import Dict, List, Any
+from vector_store import VectorStore, StoreSnapshot, tokenize, extract_query_words
+
+# Reciprocal rank fusion constant: higher values flatten the rank contributions
+RRF_K = 60
+# Weight of the HDC ranking relative to the lexical one. Query and item
+# encodings share little positional structure unless phrased alike, so HDC
+# mostly reorders items of similar lexical relevance; equal weights let its
+# noise override clear lexical wins (top-1 on the bundled questions and
+# paraphrases: 0.15 -> 93/97, 1.0 -> 79/97, lexical tiers alone -> 88/97)
+HDC_WEIGHT = 0.15
+
+class TokenIndex:
+    """Inverted index over one store snapshot: token -> sorted matrix rows"""
+    
+    def __init__(self, snapshot: StoreSnapshot):
+        self.version = snapshot.version
+        content, question, concepts = {}, {}, {}
+        
+        for row, record in enumerate(snapshot.records):
+            if record is None:
+                continue
+            
+            question_tokens = set(tokenize(record.question))
+            concept_tokens = set(tokenize(' '.join(record.concepts)))
+            all_tokens = (question_tokens | concept_tokens | set(tokenize(record.answer))
+                          | set(tokenize(record.topic)))
+            
+            for postings, tokens in ((content, all_tokens), (question, question_tokens),
+                                     (concepts, concept_tokens)):
+                for token in tokens:
+                    postings.setdefault(token, []).append(row)
+        
+        # Rows were appended in order, so every posting list is already sorted
+        self.content = {token: np.array(rows, dtype=np.intp) for token, rows in content.items()}
+        self.question = {token: np.array(rows, dtype=np.intp) for token, rows in question.items()}
+        self.concepts = {token: np.array(rows, dtype=np.intp) for token, rows in concepts.items()}
+    
+    def score(self, query_tokens: List[str], num_rows: int) -> np.ndarray:
+        """Lexical relevance per row, weighted like the direct-match tier
+        
+        10 per query word found in the item, +20 when it is in the question,
+        +15 when it is in the concepts.
+        """
+        scores = np.zeros(num_rows, dtype=np.int64)
+        for token in query_tokens:
+            for postings, weight in ((self.content, 10), (self.question, 20), (self.concepts, 15)):
+                rows = postings.get(token)
+                if rows is not None:
+                    scores[rows] += weight
+        return scores
+
+class HybridRetriever:
+    """Lexical candidate generation + HDC rescoring of the candidates only
+    
+    The token index is rebuilt lazily whenever the store publishes a new
+    snapshot version. Candidates are ranked twice - by lexical relevance and
+    by HDC similarity to the query vector - and the two rankings are fused
+    with reciprocal rank fusion, so no full vector scan is needed.
+    """
+    
+    def __init__(self, vector_store: VectorStore, max_candidates: int = 200, rrf_k: int = RRF_K,
+                 hdc_weight: float = HDC_WEIGHT):
+        self.vector_store = vector_store
+        self.max_candidates = max_candidates
+        self.rrf_k = rrf_k
+        self.hdc_weight = hdc_weight
+        self._index = None
+        self._index_lock = threading.Lock()
+    
+    def _get_index(self, snapshot: StoreSnapshot) -> TokenIndex:
+        """Token index for this snapshot, built on first use per version"""
+        index = self._index
+        if index is None or index.version != snapshot.version:
+            with self._index_lock:
+                index = self._index
+                if index is None or index.version != snapshot.version:
+                    index = TokenIndex(snapshot)
+                    self._index = index
+        return index
+    
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Fused ranking of the items sharing at least one word with the query
+        
+        Each result is a copy of the item's metadata with 'relevance' (the
+        lexical score), 'hdc_similarity', 'fused_score', 'matched_words' and
+        'match_type'. Returns [] when no item shares a word with the query.
+        """
+        snapshot = self.vector_store.snapshot()
+        query_tokens = list(dict.fromkeys(extract_query_words(query)))
+        if not query_tokens or not snapshot.keys:
+            return []
+        
+        index = self._get_index(snapshot)
+        lexical_scores = index.score(query_tokens, len(snapshot.keys))
+        rows = np.flatnonzero(lexical_scores)
+        if len(rows) == 0:
+            return []
+        
+        # Keep the best lexical candidates (ties in row order) for rescoring
+        lexical_order = np.argsort(-lexical_scores[rows], kind='stable')[:self.max_candidates]
+        rows = rows[lexical_order]
+        
+        query_vector = self.vector_store.create_query_vector(query)
+        hdc_scores = self.vector_store.score_rows(query_vector, rows, snapshot)
+        hdc_order = np.argsort(-hdc_scores, kind='stable')
+        
+        # Reciprocal rank fusion. Rows are in lexical order; equal lexical
+        # scores share a rank so HDC alone decides between them
+        candidate_scores = -lexical_scores[rows]
+        lexical_ranks = np.searchsorted(candidate_scores, candidate_scores, side='left')
+        hdc_ranks = np.empty(len(rows), dtype=np.intp)
+        hdc_ranks[hdc_order] = np.arange(len(rows))
+        fused = (1.0 / (self.rrf_k + 1 + lexical_ranks)
+                 + self.hdc_weight / (self.rrf_k + 1 + hdc_ranks))
+        
+        results = []
+        content_postings = index.content
+        for i in np.argsort(-fused, kind='stable')[:top_k]:
+            row = rows[i]
+            record = snapshot.records[row]
+            item = record.copy()
+            item['relevance'] = int(lexical_scores[row])
+            item['hdc_similarity'] = float(hdc_scores[i])
+            item['fused_score'] = float(fused[i])
+            item['matched_words'] = [token for token in query_tokens
+                                     if token in content_postings and row in content_postings[token]]
+            item['match_type'] = 'hybrid'
+            results.append(item)
+        
+        return results
@@ -3,9 +3,24 @@ HYPERCENTAUR SYSTEM
 
 """
 import streamlit as st
+import os
 import re
 import time
-from typing import Dict, List, Any
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Iterator, Set, Tuple
+
+# RENDERING CONFIG - set on the server through environment variables
+# HYPERCENTAUR_RENDER_MODE: 'stream' (word streaming, Streamlit >= 1.31; renders
+# instantly on older versions), 'typewriter' or 'instant'
+RENDER_MODE = os.environ.get('HYPERCENTAUR_RENDER_MODE', 'stream')
+# HYPERCENTAUR_DISABLE_DELAYS=1 turns off every artificial pause
+DISABLE_DELAYS = os.environ.get('HYPERCENTAUR_DISABLE_DELAYS', '0').lower() in ('1', 'true', 'yes')
+WORD_DELAY = 0.0 if DISABLE_DELAYS else float(os.environ.get('HYPERCENTAUR_WORD_DELAY', '0.02'))
+THINKING_STEP_DELAY = 0.0 if DISABLE_DELAYS else float(os.environ.get('HYPERCENTAUR_THINKING_DELAY', '0.2'))
+
+# BACKEND CONFIG - 'builtin' serves PSYCHOLOGY_DB below, 'hdc' serves the
+# persisted VectorStore through QueryProcessor (see engine.py)
+BACKEND = os.environ.get('HYPERCENTAUR_BACKEND', 'builtin')
 
 # COMPREHENSIVE PSYCHOLOGY DATABASE - BUILT IN
 PSYCHOLOGY_DB = [
@@ -222,9 +237,117 @@ PSYCHOLOGY_DB = [
     }
 ]
 
+class PsychologyIndex:
+    """Lookup structures over a keyword database, built once so queries never rescan it"""
+    
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+        
+        # Exact hits: keyword -> {entry index: occurrences in that entry}
+        self.keyword_entries = {}
+        for idx, entry in enumerate(entries):
+            for keyword in entry['keywords']:
+                counts = self.keyword_entries.setdefault(keyword.lower(), {})
+                counts[idx] = counts.get(idx, 0) + 1
+        
+        # Partial hits: every suffix of every keyword, sorted, so that
+        # "query word inside keyword" becomes a prefix range lookup
+        suffix_pairs = sorted({(keyword[i:], keyword)
+                               for keyword in self.keyword_entries
+                               for i in range(len(keyword))})
+        self.suffixes = [suffix for suffix, _ in suffix_pairs]
+        self.suffix_keywords = [keyword for _, keyword in suffix_pairs]
+        
+        # Pre-lowercased question/answer text, joined so one find() scans every entry
+        self.question_text, self.question_offsets = self._join_text([entry['question'] for entry in entries])
+        self.answer_text, self.answer_offsets = self._join_text([entry['answer'] for entry in entries])
+    
+    @staticmethod
+    def _join_text(texts: List[str]) -> Tuple[str, List[int]]:
+        """Join lowercased texts with a separator no query word can contain"""
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + 1
+        return '\0'.join(text.lower() for text in texts), offsets
+    
+    @staticmethod
+    def _text_entries(text: str, offsets: List[int], word: str) -> Set[int]:
+        """Indices of entries whose text contains word"""
+        found = set()
+        position = text.find(word)
+        while position != -1:
+            idx = bisect_right(offsets, position) - 1
+            found.add(idx)
+            # Skip to the next entry - one hit per entry is enough
+            if idx + 1 >= len(offsets):
+                break
+            position = text.find(word, offsets[idx + 1])
+        return found
+    
+    def partial_entries(self, word: str) -> Set[int]:
+        """Indices of entries with a keyword containing, or contained in, word"""
+        keywords = set()
+        
+        # Keyword inside the query word: look up every substring of the word
+        for start in range(len(word)):
+            for end in range(start + 1, len(word) + 1):
+                if word[start:end] in self.keyword_entries:
+                    keywords.add(word[start:end])
+        
+        # Query word inside a keyword: suffixes that start with the word
+        start = bisect_left(self.suffixes, word)
+        end = bisect_left(self.suffixes, word + '\uffff', start)
+        keywords.update(self.suffix_keywords[start:end])
+        
+        entries = set()
+        for keyword in keywords:
+            entries.update(self.keyword_entries[keyword])
+        return entries
+    
+    def score_entries(self, query_keywords: List[str]) -> Iterator[Tuple[int, int, List[str]]]:
+        """Yield (entry index, score, matched keywords) for every entry with a hit"""
+        words = [word.lower() for word in query_keywords]
+        distinct = list(dict.fromkeys(words))
+        
+        exact_hits = {word: self.keyword_entries.get(word, {}) for word in distinct}
+        partial_hits = {word: self.partial_entries(word) for word in distinct}
+        question_hits = {word: self._text_entries(self.question_text, self.question_offsets, word) for word in distinct}
+        answer_hits = {word: self._text_entries(self.answer_text, self.answer_offsets, word) for word in distinct}
+        
+        candidates = set()
+        for hits in (exact_hits, partial_hits, question_hits, answer_hits):
+            for entries in hits.values():
+                candidates.update(entries)
+        
+        for idx in sorted(candidates):
+            score = 0
+            matched_keywords = []
+            
+            # METHOD 1: Exact keyword matches (highest score)
+            for query_kw, word in zip(query_keywords, words):
+                occurrences = exact_hits[word].get(idx, 0)
+                score += 20 * occurrences
+                matched_keywords.extend([query_kw] * occurrences)
+            
+            # METHODS 2-4: partial keyword, question text and answer text matches
+            for hits, points in ((partial_hits, 10), (question_hits, 8), (answer_hits, 3)):
+                for query_kw, word in zip(query_keywords, words):
+                    if idx in hits[word] and query_kw not in matched_keywords:  # Don't double count
+                        score += points
+                        matched_keywords.append(query_kw)
+            
+            # Bonus for multiple matches
+            if len(matched_keywords) > 1:
+                score += len(matched_keywords) * 5
+            
+            yield idx, score, matched_keywords
+
+PSYCHOLOGY_INDEX = PsychologyIndex(PSYCHOLOGY_DB)
+
 class SimpleHypercentaur:
-    def __init__(self):
-        self.query_history = []
+    """Read-only query engine over PSYCHOLOGY_DB, shared by all sessions"""
     
     def process_query(self, query: str) -> Dict[str, Any]:
         """Simple but effective query processing"""
@@ -246,7 +369,7 @@ class SimpleHypercentaur:
         best_match = self._find_best_match(query_words)
         
         if best_match:
-            response = {
+            return {
                 'response': best_match['answer'],
                 'confidence': best_match['confidence'],
                 'success': True,
@@ -254,14 +377,6 @@ class SimpleHypercentaur:
                 'matched_question': best_match['question'],
                 'matched_keywords': best_match['matched_keywords']
             }
-            
-            # Store in history
-            self.query_history.append({
-                'query': query,
-                'response': response
-            })
-            
-            return response
         else:
             # This should rarely happen with our comprehensive database
             return {
@@ -284,64 +399,16 @@ class SimpleHypercentaur:
         return keywords
     
     def _find_best_match(self, query_keywords: List[str]) -> Dict[str, Any]:
-        """Find the best matching psychology entry - FIXED TO ACTUALLY WORK"""
+        """Find the best matching psychology entry using the prebuilt index"""
         best_score = 0
         best_entry = None
         
         print(f"\n=== MATCHING PROCESS ===")
         print(f"Query keywords: {query_keywords}")
         
-        for i, entry in enumerate(PSYCHOLOGY_DB):
-            score = 0
-            matched_keywords = []
-            
-            print(f"\nChecking entry {i+1}: {entry['question']}")
-            print(f"Entry keywords: {entry['keywords']}")
-            
-            # METHOD 1: Exact keyword matches (highest score)
-            for query_kw in query_keywords:
-                for entry_kw in entry['keywords']:
-                    if query_kw.lower() == entry_kw.lower():
-                        score += 20
-                        matched_keywords.append(query_kw)
-                        print(f"  EXACT match: '{query_kw}' = '{entry_kw}' (+20)")
-            
-            # METHOD 2: Partial keyword matches (medium score)
-            for query_kw in query_keywords:
-                for entry_kw in entry['keywords']:
-                    if query_kw.lower() in entry_kw.lower() or entry_kw.lower() in query_kw.lower():
-                        if query_kw not in matched_keywords:  # Don't double count
-                            score += 10
-                            matched_keywords.append(query_kw)
-                            print(f"  PARTIAL match: '{query_kw}' ~ '{entry_kw}' (+10)")
-            
-            # METHOD 3: Question text matches (medium score)
-            question_lower = entry['question'].lower()
-            for query_kw in query_keywords:
-                if query_kw.lower() in question_lower:
-                    if query_kw not in matched_keywords:  # Don't double count
-                        score += 8
-                        matched_keywords.append(query_kw)
-                        print(f"  QUESTION match: '{query_kw}' in question (+8)")
-            
-            # METHOD 4: Answer text matches (low score)
-            answer_lower = entry['answer'].lower()
-            for query_kw in query_keywords:
-                if query_kw.lower() in answer_lower:
-                    if query_kw not in matched_keywords:  # Don't double count
-                        score += 3
-                        matched_keywords.append(query_kw)
-                        print(f"  ANSWER match: '{query_kw}' in answer (+3)")
-            
-            # Bonus for multiple matches
-            if len(matched_keywords) > 1:
-                bonus = len(matched_keywords) * 5
-                score += bonus
-                print(f"  MULTI-MATCH bonus: {len(matched_keywords)} matches (+{bonus})")
-            
-            print(f"  TOTAL SCORE: {score}")
-            
+        for idx, score, matched_keywords in PSYCHOLOGY_INDEX.score_entries(query_keywords):
             if score > best_score:
+                entry = PSYCHOLOGY_DB[idx]
                 best_score = score
                 best_entry = {
                     'question': entry['question'],
@@ -351,7 +418,6 @@ class SimpleHypercentaur:
                     'matched_keywords': list(set(matched_keywords)),  # Remove duplicates
                     'raw_score': score
                 }
-                print(f"  >>> NEW BEST MATCH! <<<")
         
         print(f"\n=== FINAL RESULT ===")
         if best_entry:
@@ -368,20 +434,81 @@ class SimpleHypercentaur:
         """Get system statistics"""
         return {
             'total_entries': len(PSYCHOLOGY_DB),
-            'total_queries': len(self.query_history),
             'topics': list(set(entry['topic'] for entry in PSYCHOLOGY_DB))
         }
 
-def typewriter_effect(text: str, container, delay: float = 0.03):
-    """Create a typewriter effect for displaying text"""
+class EngineHypercentaur:
+    """Serves the app from the VectorStore/QueryProcessor engine"""
+    
+    def __init__(self, engine):
+        self.engine = engine
+    
+    def process_query(self, query: str) -> Dict[str, Any]:
+        """Answer through QueryProcessor, reshaped to what the UI displays"""
+        result = self.engine.process_query(query)
+        
+        debug_info = result.get('debug_info', {})
+        if debug_info.get('matched_question'):
+            result['matched_question'] = debug_info['matched_question']
+            result['matched_keywords'] = result.get('concepts_used', [])
+        
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get system statistics"""
+        stats = self.engine.get_stats()
+        return {
+            'total_entries': stats['total_vectors'],
+            'topics': stats['topics']
+        }
+
+@st.cache_resource
+def load_hypercentaur(backend: str = BACKEND):
+    """Build the engine once per server process and share it across sessions"""
+    if backend == 'hdc':
+        # Imported here so the builtin backend never pays for NumPy/HDC imports
+        from engine import load_engine
+        # One engine serves every session; history lives in st.session_state
+        return EngineHypercentaur(load_engine(record_history=False))
+    
+    return SimpleHypercentaur()
+
+def stream_words(text: str, delay: float = WORD_DELAY) -> Iterator[str]:
+    """Yield the text word by word (keeping whitespace) with an optional pause"""
+    for word in re.findall(r'\S+\s*', text):
+        yield word
+        if delay:
+            time.sleep(delay)
+
+def typewriter_effect(text: str, container, delay: float = WORD_DELAY, words_per_update: int = 3):
+    """Create a typewriter effect, re-rendering once per few words instead of per character"""
     displayed_text = ""
-    for char in text:
-        displayed_text += char
-        container.markdown(displayed_text)
-        time.sleep(delay)
+    for i, word in enumerate(stream_words(text, delay=0), start=1):
+        displayed_text += word
+        if i % words_per_update == 0:
+            container.markdown(f"<div class='typewriter-container'>{displayed_text}</div>", unsafe_allow_html=True)
+            if delay:
+                time.sleep(delay * words_per_update)
+    container.markdown(f"<div class='typewriter-container'>{text}</div>", unsafe_allow_html=True)
+
+def render_response(text: str, container):
+    """Render an answer according to RENDER_MODE"""
+    if RENDER_MODE == 'typewriter' and not DISABLE_DELAYS:
+        typewriter_effect(text, container)
+    elif RENDER_MODE == 'stream' and not DISABLE_DELAYS and hasattr(st, 'write_stream'):
+        # Streamlit >= 1.31 sends only the new chunks over the websocket
+        with container.container():
+            st.write_stream(stream_words(text))
+    else:
+        # 'instant', and 'stream' on older Streamlit (the pinned 1.28 has no
+        # write_stream): one render, rather than the typewriter's re-sends
+        container.markdown(f"<div class='typewriter-container'>{text}</div>", unsafe_allow_html=True)
 
 def simulate_thinking():
     """Simulate AI thinking process"""
+    if not THINKING_STEP_DELAY:
+        return
+    
     thinking_messages = [
         "🤔 Analyzing your question...",
         "🧠 Searching knowledge database...",
@@ -393,7 +520,7 @@ def simulate_thinking():
     
     for i, message in enumerate(thinking_messages):
         thinking_container.info(f"**Step {i+1}/4:** {message}")
-        time.sleep(0.8)
+        time.sleep(THINKING_STEP_DELAY)
     
     thinking_container.empty()
 
@@ -456,9 +583,11 @@ def main():
     st.title("🧠 Hypercentaur - Psychology AI")
     st.subheader("Simple, Fast, and Actually Working!")
     
-    # Initialize system
-    if 'hypercentaur' not in st.session_state:
-        st.session_state.hypercentaur = SimpleHypercentaur()
+    # Shared engine - only per-user state lives in the session
+    hypercentaur = load_hypercentaur()
+    
+    if 'query_history' not in st.session_state:
+        st.session_state.query_history = []
     
     # Initialize query counter - FIX #2: Proper counting from 1
     if 'queries_processed' not in st.session_state:
@@ -469,7 +598,7 @@ def main():
         st.session_state.last_result = None
     
     # Display stats
-    stats = st.session_state.hypercentaur.get_stats()
+    stats = hypercentaur.get_stats()
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Knowledge Entries", stats['total_entries'])
@@ -496,7 +625,14 @@ def main():
         simulate_thinking()
         
         # Process the query
-        result = st.session_state.hypercentaur.process_query(query)
+        result = hypercentaur.process_query(query)
+        
+        # Store matched answers in this session's history
+        if 'matched_question' in result:
+            st.session_state.query_history.append({
+                'query': query,
+                'response': result
+            })
         
         # Store result to persist after rerun
         st.session_state.last_result = result
@@ -505,15 +641,11 @@ def main():
         if result['success']:
             st.success("**Response:**")
             
-            # Container for typewriter effect
+            # Container for the animated response
             response_container = st.empty()
             
-            # FIX #3: Typewriter effect for the response
-            displayed_text = ""
-            for char in result['response']:
-                displayed_text += char
-                response_container.markdown(f"<div class='typewriter-container'>{displayed_text}</div>", unsafe_allow_html=True)
-                time.sleep(0.02)  # Typing speed
+            # FIX #3: Stream the response (mode set by HYPERCENTAUR_RENDER_MODE)
+            render_response(result['response'], response_container)
             
             # Show additional info after typing is complete
             col1, col2 = st.columns(2)
@@ -563,9 +695,9 @@ def main():
             st.error(result['response'])
     
     # Show query history
-    if st.session_state.hypercentaur.query_history:
+    if st.session_state.query_history:
         st.subheader("Recent Queries")
-        for i, entry in enumerate(reversed(st.session_state.hypercentaur.query_history[-5:])):
+        for i, entry in enumerate(reversed(st.session_state.query_history[-5:])):
             with st.expander(f"Q: {entry['query'][:60]}..."):
                 st.write(f"**A:** {entry['response']['response'][:200]}...")
     
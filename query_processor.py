@@ -2,21 +2,253 @@
 Query Understanding and Processing Module - SIMPLIFIED AND WORKING
 """
 import re
+import asyncio
+import threading
+import weakref
 import numpy as np
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Optional, Any
 from hdc_core import HDCCore
-from vector_store import VectorStore
+from vector_store import VectorStore, StoreSnapshot, extract_query_words
 from reasoning_engine import ReasoningEngine
+from hybrid_retriever import HybridRetriever
+
+# Query keyword -> related terms searched for by the topic tier
+PSYCHOLOGY_KEYWORDS = {
+    # Learning keywords
+    'learn': ['learning', 'conditioning', 'reinforcement', 'behavior', 'training'],
+    'condition': ['classical', 'operant', 'conditioning', 'pavlov', 'skinner'],
+    'behavior': ['behaviorism', 'behavior', 'conditioning', 'reinforcement'],
+    
+    # Memory keywords  
+    'memory': ['memory', 'remember', 'forget', 'recall', 'encoding'],
+    'remember': ['memory', 'recall', 'encoding', 'storage', 'retrieval'],
+    'forget': ['forgetting', 'memory', 'recall'],
+    'brain': ['memory', 'cognition', 'neural', 'brain', 'mind'],
+    
+    # Emotion keywords
+    'emotion': ['emotion', 'feeling', 'mood', 'affect', 'emotional'],
+    'feel': ['emotion', 'feeling', 'mood', 'grief', 'anxiety'],
+    'anxiety': ['anxiety', 'fear', 'stress', 'worry'],
+    'sad': ['depression', 'grief', 'sadness', 'emotion'],
+    'stress': ['stress', 'anxiety', 'pressure', 'tension'],
+    
+    # Cognitive keywords
+    'think': ['cognitive', 'cognition', 'thinking', 'thought', 'mind'],
+    'mind': ['cognitive', 'mental', 'thinking', 'consciousness'],
+    'bias': ['bias', 'cognitive', 'thinking', 'judgment'],
+    'decision': ['cognitive', 'bias', 'thinking', 'judgment'],
+    
+    # Social keywords
+    'social': ['social', 'group', 'conformity', 'obedience'],
+    'people': ['social', 'group', 'human', 'behavior'],
+    'group': ['social', 'conformity', 'groupthink', 'obedience'],
+    
+    # Development keywords
+    'child': ['development', 'children', 'growth', 'stages'],
+    'develop': ['development', 'growth', 'stages', 'piaget'],
+    'grow': ['development', 'growth', 'children'],
+    
+    # Therapy keywords
+    'therapy': ['therapy', 'treatment', 'counseling', 'help'],
+    'help': ['therapy', 'treatment', 'counseling', 'support'],
+    'treat': ['therapy', 'treatment', 'help'],
+    
+    # Motivation keywords
+    'motivat': ['motivation', 'drive', 'goal', 'incentive'],
+    'goal': ['motivation', 'drive', 'achievement'],
+    'want': ['motivation', 'desire', 'drive']
+}
+
+
+class FallbackIndex:
+    """Query-independent parts of the matching tiers for one store version
+    
+    Built once per vector store snapshot version instead of on every query:
+    lower-cased item texts plus the joined corpus text (a query word found
+    nowhere skips the direct scan), topic-tier hits per keyword, the fuzzy
+    tier's word vocabulary with per-item counts, and the emergency ranking,
+    which does not depend on the query at all.
+    """
+    
+    def __init__(self, data: List[Dict], version: Optional[int] = None):
+        self.version = version
+        self.data = data
+        
+        # Tier 1: (question, all searchable content, concepts) per item, lower-cased
+        self.direct_texts = []
+        for item in data:
+            question = item.get('question', '').lower()
+            answer = item.get('answer', '').lower()
+            topic = item.get('topic', '').lower()
+            concepts = ' '.join(item.get('concepts', [])).lower()
+            self.direct_texts.append((question, f"{question} {answer} {topic} {concepts}", concepts))
+        self.corpus_text = '\0'.join(content for _, content, _ in self.direct_texts)
+        
+        # Tier 2: keyword -> [(item, related term matches)], filled on first use
+        self.topic_texts = [f"{item.get('question', '')} {item.get('answer', '')} {item.get('topic', '')}".lower()
+                            for item in data]
+        self.topic_hits = {}
+        
+        # Tier 3: distinct content words (> 3 chars) and (item, word, count) triples
+        vocabulary = {}
+        item_rows, word_ids, counts = [], [], []
+        for row, item in enumerate(data):
+            content = f"{item.get('question', '')} {item.get('answer', '')} {' '.join(item.get('concepts', []))}".lower()
+            for word, count in Counter(word for word in content.split() if len(word) > 3).items():
+                item_rows.append(row)
+                word_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+                counts.append(count)
+        self.vocabulary = list(vocabulary)
+        self.item_rows = np.array(item_rows, dtype=np.intp)
+        self.word_ids = np.array(word_ids, dtype=np.intp)
+        self.word_counts = np.array(counts, dtype=np.int64)
+        
+        # Tier 4: items with the longest, most comprehensive answers
+        self.emergency_items = self._rank_emergency(data)
+    
+    def topic_matches(self, keyword: str) -> List[Tuple[Dict, int]]:
+        """Items containing any of the keyword's related terms, with match counts"""
+        hits = self.topic_hits.get(keyword)
+        if hits is None:
+            related_terms = PSYCHOLOGY_KEYWORDS[keyword]
+            hits = []
+            for item, content in zip(self.data, self.topic_texts):
+                matches = sum(1 for term in related_terms if term in content)
+                if matches > 0:
+                    hits.append((item, matches))
+            self.topic_hits[keyword] = hits
+        return hits
+    
+    def fuzzy_scores(self, query_words: List[str]) -> np.ndarray:
+        """Per-item fuzzy score, computed once per distinct word and weighted by counts"""
+        word_scores = np.zeros(len(self.vocabulary), dtype=np.int64)
+        for query_word in query_words:
+            if len(query_word) <= 3:
+                continue
+            for word_id, content_word in enumerate(self.vocabulary):
+                # Check for partial matches
+                if query_word in content_word or content_word in query_word:
+                    word_scores[word_id] += 5
+                # Check for similar starts (first 3-4 characters)
+                elif query_word[:3] == content_word[:3] and len(query_word) > 4:
+                    word_scores[word_id] += 3
+        
+        scores = np.zeros(len(self.data), dtype=np.int64)
+        np.add.at(scores, self.item_rows, self.word_counts * word_scores[self.word_ids])
+        return scores
+    
+    @staticmethod
+    def _rank_emergency(data: List[Dict]) -> List[Tuple[Dict, int]]:
+        """Top 3 items by answer comprehensiveness"""
+        scored_items = []
+        
+        for item in data:
+            answer = item.get('answer', '')
+            
+            # Score based on answer comprehensiveness
+            score = len(answer.split())  # Word count
+            if 'psychology' in answer.lower() or 'psychological' in answer.lower():
+                score += 50
+            if len(answer) > 200:  # Long, detailed answers
+                score += 30
+            
+            scored_items.append((item, score))
+        
+        # Sort by comprehensiveness and return top items
+        scored_items.sort(key=lambda x: x[1], reverse=True)
+        return scored_items[:3]
+
+# 'lexical': tiered text matching only; 'hybrid': HybridRetriever first,
+# falling back to the lexical tiers when no item shares a word with the query
+RETRIEVAL_MODES = ('lexical', 'hybrid')
 
 class QueryProcessor:
-    def __init__(self, hdc_core: HDCCore, vector_store: VectorStore, reasoning_engine: ReasoningEngine):
+    def __init__(self, hdc_core: HDCCore, vector_store: VectorStore, reasoning_engine: ReasoningEngine,
+                 max_concurrency: int = 8, retrieval_mode: str = 'lexical', record_history: bool = True):
         self.hdc = hdc_core
         self.vector_store = vector_store
         self.reasoning_engine = reasoning_engine
-        self.query_history = []
+        
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}' (choose from {', '.join(RETRIEVAL_MODES)})")
+        self.retrieval_mode = retrieval_mode
+        self.hybrid_retriever = HybridRetriever(vector_store)
+        
+        # Matching-tier precomputation for the current store version
+        self._fallback_index = None
+        self._fallback_lock = threading.Lock()
+        
+        # Shared history, bounded and guarded - per-request state never lives here.
+        # Multi-user front ends keep history per session and turn this off
+        self.record_history = record_history
+        self.query_history = deque(maxlen=20)
+        self._history_lock = threading.Lock()
+        
+        # Async API: CPU-bound scoring runs in a thread pool, in-flight work is bounded
+        self.max_concurrency = max_concurrency
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._semaphores = weakref.WeakKeyDictionary()  # one per event loop
         
     def process_query(self, query: str) -> Dict[str, Any]:
         """SIMPLIFIED query processing that WORKS"""
+        response = self._answer_query(query)
+        
+        # Store in history
+        if self.record_history and response.get('success', True):
+            self._update_history(query, response)
+        
+        return response
+    
+    async def aprocess_query(self, query: str) -> Dict[str, Any]:
+        """Async process_query - scoring is offloaded, at most max_concurrency at once"""
+        loop = asyncio.get_running_loop()
+        
+        async with self._get_semaphore(loop):
+            response = await loop.run_in_executor(self._get_executor(), self._answer_query, query)
+        
+        # Store in history
+        if self.record_history and response.get('success', True):
+            self._update_history(query, response)
+        
+        return response
+    
+    async def aprocess_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Answer many queries concurrently, keeping input order"""
+        return await asyncio.gather(*(self.aprocess_query(query) for query in queries))
+    
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """Semaphores belong to one event loop, so keep one per loop"""
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker pool on first async use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                    thread_name_prefix='query')
+            return self._executor
+    
+    def close(self):
+        """Shut down the async worker pool"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+    
+    def _answer_query(self, query: str) -> Dict[str, Any]:
+        """Answer one query; safe to call concurrently
+        
+        Per-request state is local. Shared state touched on the way (the HDC
+        concept vectors, the query-vector cache, the tier and token indexes)
+        is guarded by locks or published atomically.
+        """
         try:
             print(f"\n=== PROCESSING QUERY: '{query}' ===")
             
@@ -25,7 +257,8 @@ class QueryProcessor:
             print(f"Clean query: '{clean_query}'")
             
             # Step 2: Get ALL available data and search directly
-            all_data = self._get_all_available_data()
+            snapshot = self.vector_store.snapshot()
+            all_data = self._get_all_available_data(snapshot)
             print(f"Available data items: {len(all_data)}")
             
             if not all_data:
@@ -35,8 +268,12 @@ class QueryProcessor:
                     'confidence': 0.0
                 }
             
-            # Step 3: Find best match using simple text matching
-            best_matches = self._find_best_matches(clean_query, all_data)
+            # Step 3: Find best match - hybrid lexical + HDC ranking, or simple text matching
+            best_matches = []
+            if self.retrieval_mode == 'hybrid':
+                best_matches = self.hybrid_retriever.search(clean_query)
+            if not best_matches:
+                best_matches = self._find_best_matches(clean_query, all_data, snapshot.version)
             print(f"Found {len(best_matches)} matches")
             
             if best_matches:
@@ -54,6 +291,7 @@ class QueryProcessor:
                         'success': True,
                         'confidence': min(best_match.get('relevance', 50) / 100.0, 0.95),
                         'reasoning_type': 'direct_match',
+                        'topic': best_match.get('topic', 'General'),
                         'concepts_used': best_match.get('matched_words', best_match.get('concepts', [])),
                         'sources_count': len(best_matches),
                         'debug_info': {
@@ -78,9 +316,6 @@ class QueryProcessor:
                     'confidence': 0.3
                 }
             
-            # Store in history
-            self._update_history(query, response)
-            
             return response
             
         except Exception as e:
@@ -103,10 +338,11 @@ class QueryProcessor:
         clean = re.sub(r'\s+', ' ', query.strip())
         return clean
     
-    def _get_all_available_data(self) -> List[Dict]:
-        """Get all available data from vector store"""
+    def _get_all_available_data(self, snapshot: Optional[StoreSnapshot] = None) -> List[Dict]:
+        """Get all available data from vector store (or the given snapshot of it)"""
         try:
-            all_metadata = list(self.vector_store.metadata.values())
+            snapshot = snapshot or self.vector_store.snapshot()
+            all_metadata = list(snapshot.metadata.values())
             print(f"Retrieved {len(all_metadata)} items from vector store")
             
             if all_metadata:
@@ -120,35 +356,50 @@ class QueryProcessor:
             print(f"Error getting data: {e}")
             return []
     
-    def _find_best_matches(self, query: str, data: List[Dict]) -> List[Dict]:
-        """COMPLETELY REVAMPED matching - finds relevant content for ANY psychology query"""
+    def _get_fallback_index(self, data: List[Dict], version: Optional[int]) -> FallbackIndex:
+        """Tier precomputation for data; reused while the store version is unchanged"""
+        if version is None:
+            return FallbackIndex(data)
+        
+        index = self._fallback_index
+        if index is None or index.version != version:
+            with self._fallback_lock:
+                index = self._fallback_index
+                if index is None or index.version != version:
+                    index = FallbackIndex(data, version)
+                    self._fallback_index = index
+        return index
+    
+    def _find_best_matches(self, query: str, data: List[Dict], version: Optional[int] = None) -> List[Dict]:
+        """COMPLETELY REVAMPED matching - finds relevant content for ANY psychology query
+        
+        version is the store snapshot version data was taken from; with it the
+        query-independent tier work is reused across queries.
+        """
         if not data:
             return []
         
+        index = self._get_fallback_index(data, version)
+        
         query_lower = query.lower().strip()
         print(f"\n=== MATCHING QUERY: '{query_lower}' ===")
         
         # Extract ALL meaningful words from query
-        query_words = []
-        for word in query_lower.split():
-            clean_word = ''.join(c for c in word if c.isalpha())
-            if len(clean_word) > 2 and clean_word not in ['the', 'what', 'how', 'why', 'when', 'where', 'who', 'does', 'can', 'will', 'are', 'and', 'but', 'for']:
-                query_words.append(clean_word)
+        query_words = extract_query_words(query_lower)
         
         print(f"Extracted query words: {query_words}")
         
         all_matches = []
         
-        # METHOD 1: Direct content search - scan ALL text for ANY query words
-        for item in data:
-            question = item.get('question', '').lower()
-            answer = item.get('answer', '').lower() 
-            topic = item.get('topic', '').lower()
-            concepts = ' '.join(item.get('concepts', [])).lower()
-            
-            # Combine all content for searching
-            all_content = f"{question} {answer} {topic} {concepts}"
-            
+        # METHOD 1: Direct content search - scan ALL text for ANY query words,
+        # unless no query word occurs anywhere in the knowledge base
+        if not any(word in index.corpus_text for word in query_words):
+            print("No query word occurs in the knowledge base, skipping direct search")
+            direct_texts = []
+        else:
+            direct_texts = index.direct_texts
+        
+        for item, (question, all_content, concepts) in zip(data, direct_texts):
             # Calculate relevance score
             relevance = 0
             matched_words = []
@@ -176,19 +427,19 @@ class QueryProcessor:
         # METHOD 2: Psychology topic mapping - if no direct matches, find by topic
         if not all_matches:
             print("No direct matches, trying topic mapping...")
-            topic_matches = self._find_by_psychology_topics(query_lower, data)
+            topic_matches = self._find_by_psychology_topics(query_lower, index)
             all_matches.extend(topic_matches)
         
         # METHOD 3: Fuzzy matching - find similar words
         if not all_matches:
             print("No topic matches, trying fuzzy matching...")
-            fuzzy_matches = self._fuzzy_match_psychology(query_words, data)
+            fuzzy_matches = self._fuzzy_match_psychology(query_words, index)
             all_matches.extend(fuzzy_matches)
         
         # METHOD 4: Emergency fallback - return most relevant psychology content
         if not all_matches:
             print("Emergency fallback - returning general psychology content...")
-            emergency_matches = self._emergency_psychology_fallback(query_lower, data)
+            emergency_matches = self._emergency_psychology_fallback(query_lower, index)
             all_matches.extend(emergency_matches)
         
         # Sort by relevance and return
@@ -201,95 +452,32 @@ class QueryProcessor:
         
         return final_matches
     
-    def _find_by_psychology_topics(self, query: str, data: List[Dict]) -> List[Dict]:
+    def _find_by_psychology_topics(self, query: str, index: FallbackIndex) -> List[Dict]:
         """Find content by psychology topic areas"""
-        psychology_keywords = {
-            # Learning keywords
-            'learn': ['learning', 'conditioning', 'reinforcement', 'behavior', 'training'],
-            'condition': ['classical', 'operant', 'conditioning', 'pavlov', 'skinner'],
-            'behavior': ['behaviorism', 'behavior', 'conditioning', 'reinforcement'],
-            
-            # Memory keywords  
-            'memory': ['memory', 'remember', 'forget', 'recall', 'encoding'],
-            'remember': ['memory', 'recall', 'encoding', 'storage', 'retrieval'],
-            'forget': ['forgetting', 'memory', 'recall'],
-            'brain': ['memory', 'cognition', 'neural', 'brain', 'mind'],
-            
-            # Emotion keywords
-            'emotion': ['emotion', 'feeling', 'mood', 'affect', 'emotional'],
-            'feel': ['emotion', 'feeling', 'mood', 'grief', 'anxiety'],
-            'anxiety': ['anxiety', 'fear', 'stress', 'worry'],
-            'sad': ['depression', 'grief', 'sadness', 'emotion'],
-            'stress': ['stress', 'anxiety', 'pressure', 'tension'],
-            
-            # Cognitive keywords
-            'think': ['cognitive', 'cognition', 'thinking', 'thought', 'mind'],
-            'mind': ['cognitive', 'mental', 'thinking', 'consciousness'],
-            'bias': ['bias', 'cognitive', 'thinking', 'judgment'],
-            'decision': ['cognitive', 'bias', 'thinking', 'judgment'],
-            
-            # Social keywords
-            'social': ['social', 'group', 'conformity', 'obedience'],
-            'people': ['social', 'group', 'human', 'behavior'],
-            'group': ['social', 'conformity', 'groupthink', 'obedience'],
-            
-            # Development keywords
-            'child': ['development', 'children', 'growth', 'stages'],
-            'develop': ['development', 'growth', 'stages', 'piaget'],
-            'grow': ['development', 'growth', 'children'],
-            
-            # Therapy keywords
-            'therapy': ['therapy', 'treatment', 'counseling', 'help'],
-            'help': ['therapy', 'treatment', 'counseling', 'support'],
-            'treat': ['therapy', 'treatment', 'help'],
-            
-            # Motivation keywords
-            'motivat': ['motivation', 'drive', 'goal', 'incentive'],
-            'goal': ['motivation', 'drive', 'achievement'],
-            'want': ['motivation', 'desire', 'drive']
-        }
-        
         topic_matches = []
         
-        for keyword, related_terms in psychology_keywords.items():
+        for keyword, related_terms in PSYCHOLOGY_KEYWORDS.items():
             if keyword in query:
                 print(f"Found keyword '{keyword}' in query, searching for: {related_terms}")
                 
-                for item in data:
-                    content = f"{item.get('question', '')} {item.get('answer', '')} {item.get('topic', '')}".lower()
-                    
-                    # Check if any related terms appear in this item
-                    matches = sum(1 for term in related_terms if term in content)
-                    
-                    if matches > 0:
-                        item_copy = item.copy()
-                        item_copy['relevance'] = matches * 10 + 20  # Base score for topic match
-                        item_copy['match_type'] = f'topic_{keyword}'
-                        topic_matches.append(item_copy)
-                        print(f"Topic match: {item.get('question', '')[:50]}... ({matches} term matches)")
+                # Items containing the related terms are the same for every query
+                for item, matches in index.topic_matches(keyword):
+                    item_copy = item.copy()
+                    item_copy['relevance'] = matches * 10 + 20  # Base score for topic match
+                    item_copy['match_type'] = f'topic_{keyword}'
+                    topic_matches.append(item_copy)
+                    print(f"Topic match: {item.get('question', '')[:50]}... ({matches} term matches)")
         
         return topic_matches
     
-    def _fuzzy_match_psychology(self, query_words: List[str], data: List[Dict]) -> List[Dict]:
+    def _fuzzy_match_psychology(self, query_words: List[str], index: FallbackIndex) -> List[Dict]:
         """Find psychology content using fuzzy/partial word matching"""
         fuzzy_matches = []
         
-        for item in data:
-            content = f"{item.get('question', '')} {item.get('answer', '')} {' '.join(item.get('concepts', []))}".lower()
-            content_words = content.split()
-            
-            fuzzy_score = 0
-            
-            for query_word in query_words:
-                for content_word in content_words:
-                    if len(query_word) > 3 and len(content_word) > 3:
-                        # Check for partial matches
-                        if query_word in content_word or content_word in query_word:
-                            fuzzy_score += 5
-                        # Check for similar starts (first 3-4 characters)
-                        elif query_word[:3] == content_word[:3] and len(query_word) > 4:
-                            fuzzy_score += 3
-            
+        # Each distinct content word is compared once, then weighted by its per-item count
+        fuzzy_scores = index.fuzzy_scores(query_words)
+        
+        for item, fuzzy_score in zip(index.data, fuzzy_scores.tolist()):
             if fuzzy_score > 0:
                 item_copy = item.copy()
                 item_copy['relevance'] = fuzzy_score + 10
@@ -299,32 +487,17 @@ class QueryProcessor:
         
         return fuzzy_matches
     
-    def _emergency_psychology_fallback(self, query: str, data: List[Dict]) -> List[Dict]:
+    def _emergency_psychology_fallback(self, query: str, index: FallbackIndex) -> List[Dict]:
         """Emergency fallback - return the most comprehensive psychology answers"""
         print("Using emergency fallback - selecting best general psychology content")
         
-        # Return items with longest, most comprehensive answers
-        scored_items = []
-        
-        for item in data:
-            answer = item.get('answer', '')
-            question = item.get('question', '')
-            
-            # Score based on answer comprehensiveness
-            score = len(answer.split())  # Word count
-            if 'psychology' in answer.lower() or 'psychological' in answer.lower():
-                score += 50
-            if len(answer) > 200:  # Long, detailed answers
-                score += 30
-            
+        # The ranking only depends on the data, so it is precomputed per store version
+        top_items = []
+        for item, score in index.emergency_items:
             item_copy = item.copy()
             item_copy['relevance'] = score
             item_copy['match_type'] = 'emergency_fallback'
-            scored_items.append(item_copy)
-        
-        # Sort by comprehensiveness and return top items
-        scored_items.sort(key=lambda x: x['relevance'], reverse=True)
-        top_items = scored_items[:3]
+            top_items.append(item_copy)
         
         for item in top_items:
             print(f"Emergency selection: {item.get('question', '')[:50]}...")
@@ -332,27 +505,28 @@ class QueryProcessor:
         return top_items
     
     def _update_history(self, query: str, response: Dict):
-        """Update query history"""
-        self.query_history.append({
-            'query': query,
-            'response': response
-        })
-        
-        # Keep only last 20 queries
-        if len(self.query_history) > 20:
-            self.query_history = self.query_history[-20:]
+        """Update query history (the deque keeps only the last 20 queries)"""
+        with self._history_lock:
+            self.query_history.append({
+                'query': query,
+                'response': response
+            })
     
     def get_query_history(self) -> List[Dict]:
         """Get recent query history"""
-        return self.query_history[-10:]
+        with self._history_lock:
+            return list(self.query_history)[-10:]
     
     def get_stats(self) -> Dict[str, Any]:
         """Get processing statistics"""
-        if not self.query_history:
+        with self._history_lock:
+            history = list(self.query_history)
+        
+        if not history:
             return {'total_queries': 0}
         
-        total_queries = len(self.query_history)
-        successful_queries = sum(1 for q in self.query_history if q['response'].get('success', True))
+        total_queries = len(history)
+        successful_queries = sum(1 for q in history if q['response'].get('success', True))
         
         return {
             'total_queries': total_queries,
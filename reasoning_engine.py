@@ -4,67 +4,173 @@ Human-like Reasoning Engine using HDC
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
 from hdc_core import HDCCore
+import os
 import re
+import json
+import zlib
 import random
 
+# Phrases signalling each reasoning type, matched as substrings of the query;
+# longer phrases score higher (one point per word)
+REASONING_PHRASES = {
+    'definition': ['what is', 'define', 'meaning of', 'explain what'],
+    'comparison': ['difference between', 'compare', 'versus', 'vs', 'contrast'],
+    'causation': ['why does', 'what causes', 'reason for', 'because', 'why'],
+    'process': ['how does', 'how do', 'steps to', 'process of', 'mechanism'],
+    'example': ['give example', 'examples of', 'for instance', 'such as'],
+    'application': ['how to use', 'apply', 'practical', 'in practice'],
+    'analysis': ['analyze', 'evaluate', 'assess', 'examine']
+}
+
+class PhraseMatcher:
+    """Scores every reasoning type in a single regex pass over the query"""
+    
+    def __init__(self, phrase_groups: Dict[str, List[str]]):
+        self.types = list(phrase_groups)
+        
+        self.weights = {}
+        for pattern_type, phrases in phrase_groups.items():
+            for phrase in phrases:
+                self.weights.setdefault(phrase, []).append((pattern_type, len(phrase.split())))
+        
+        # Longest alternative first, inside a lookahead so every start position
+        # is tried and overlapping phrases are all seen
+        phrases = sorted(self.weights, key=len, reverse=True)
+        self.pattern = re.compile('(?=(' + '|'.join(re.escape(phrase) for phrase in phrases) + '))')
+        
+        # The match at a position is the longest phrase there; any shorter
+        # phrase that is its prefix matched at the same position too
+        self.implied = {phrase: [other for other in phrases if phrase.startswith(other)]
+                        for phrase in phrases}
+    
+    def score(self, text: str) -> Dict[str, int]:
+        """Sum of phrase weights per type, each phrase counted once"""
+        found = set()
+        for match in self.pattern.finditer(text):
+            found.update(self.implied[match.group(1)])
+        
+        scores = dict.fromkeys(self.types, 0)
+        for phrase in found:
+            for pattern_type, weight in self.weights[phrase]:
+                scores[pattern_type] += weight
+        return scores
+
+REASONING_MATCHER = PhraseMatcher(REASONING_PHRASES)
+
+# Phrases encoded as HDC reasoning patterns (cached on disk, see pattern_cache_path)
+PATTERN_PHRASES = {
+    'definition': ['what is', 'define', 'meaning of', 'explain'],
+    'comparison': ['difference between', 'compare', 'versus', 'vs'],
+    'causation': ['why does', 'what causes', 'reason for', 'because'],
+    'process': ['how does', 'steps to', 'process of', 'mechanism'],
+    'example': ['give example', 'for instance', 'such as', 'like'],
+    'application': ['how to use', 'apply', 'practical', 'in practice'],
+    'analysis': ['analyze', 'evaluate', 'assess', 'examine']
+}
+
+def phrases_hash(phrase_groups: Dict[str, List[str]]) -> int:
+    """Stable checksum of a phrase table, stored with cached encodings"""
+    return zlib.crc32(json.dumps(phrase_groups, sort_keys=True).encode('utf-8'))
+
 class ReasoningEngine:
-    def __init__(self, hdc_core: HDCCore):
+    def __init__(self, hdc_core: HDCCore, pattern_cache_path: Optional[str] = None):
         self.hdc = hdc_core
-        self.reasoning_patterns = {}
+        self.pattern_cache_path = pattern_cache_path
+        self._reasoning_patterns = None
         self.context_memory = []
         self.confidence_threshold = 0.4
-        
-        # Initialize reasoning patterns
-        self._init_reasoning_patterns()
-        
-    def _init_reasoning_patterns(self):
+    
+    @property
+    def reasoning_patterns(self) -> Dict[str, Dict[str, Any]]:
+        """HDC encodings of the reasoning patterns, built on first use"""
+        if self._reasoning_patterns is None:
+            patterns = self._load_reasoning_patterns()
+            if patterns is None:
+                patterns = self._init_reasoning_patterns()
+                self._save_reasoning_patterns(patterns)
+            self._reasoning_patterns = patterns
+        return self._reasoning_patterns
+        
+    def build_pattern_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Encode the reasoning patterns now and write them to pattern_cache_path"""
+        self._reasoning_patterns = self._init_reasoning_patterns()
+        self._save_reasoning_patterns(self._reasoning_patterns)
+        return self._reasoning_patterns
+        
+    def _init_reasoning_patterns(self) -> Dict[str, Dict[str, Any]]:
         """Initialize common reasoning patterns"""
-        patterns = {
-            'definition': ['what is', 'define', 'meaning of', 'explain'],
-            'comparison': ['difference between', 'compare', 'versus', 'vs'],
-            'causation': ['why does', 'what causes', 'reason for', 'because'],
-            'process': ['how does', 'steps to', 'process of', 'mechanism'],
-            'example': ['give example', 'for instance', 'such as', 'like'],
-            'application': ['how to use', 'apply', 'practical', 'in practice'],
-            'analysis': ['analyze', 'evaluate', 'assess', 'examine']
-        }
-        
         # Encode patterns as HDC vectors
-        for pattern_type, phrases in patterns.items():
+        reasoning_patterns = {}
+        for pattern_type, phrases in PATTERN_PHRASES.items():
             pattern_vectors = []
             for phrase in phrases:
                 phrase_vector = self.hdc.encode_sequence(phrase.split())
                 pattern_vectors.append(phrase_vector)
             
-            self.reasoning_patterns[pattern_type] = {
+            reasoning_patterns[pattern_type] = {
                 'vectors': pattern_vectors,
                 'combined': self.hdc.bundle(pattern_vectors)
             }
+        return reasoning_patterns
+    
+    def _load_reasoning_patterns(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load pattern encodings from the cache file if it matches this
+        dimension and the current phrase table"""
+        if not self.pattern_cache_path or not os.path.exists(self.pattern_cache_path):
+            return None
+        
+        try:
+            with np.load(self.pattern_cache_path) as data:
+                if int(data['dim']) != self.hdc.dim:
+                    return None
+                if 'phrases_hash' not in data.files or int(data['phrases_hash']) != phrases_hash(PATTERN_PHRASES):
+                    print(f"Reasoning pattern cache {self.pattern_cache_path} is stale, rebuilding")
+                    return None
+                
+                reasoning_patterns = {}
+                for pattern_type in data['types']:
+                    pattern_type = str(pattern_type)
+                    reasoning_patterns[pattern_type] = {
+                        'vectors': list(data[f'{pattern_type}_vectors']),
+                        'combined': data[f'{pattern_type}_combined']
+                    }
+            print(f"Loaded reasoning patterns from {self.pattern_cache_path}")
+            return reasoning_patterns
+        except Exception as e:
+            print(f"Error loading reasoning patterns: {e}")
+            return None
+    
+    def _save_reasoning_patterns(self, reasoning_patterns: Dict[str, Dict[str, Any]]):
+        """Write pattern encodings to the cache file, if one is configured"""
+        if not self.pattern_cache_path:
+            return
+        
+        arrays = {
+            'dim': np.array(self.hdc.dim),
+            'phrases_hash': np.array(phrases_hash(PATTERN_PHRASES), dtype=np.int64),
+            'types': np.array(list(reasoning_patterns))
+        }
+        for pattern_type, pattern in reasoning_patterns.items():
+            arrays[f'{pattern_type}_vectors'] = np.stack(pattern['vectors'])
+            arrays[f'{pattern_type}_combined'] = pattern['combined']
+        
+        try:
+            with open(self.pattern_cache_path, 'wb') as f:
+                np.savez(f, **arrays)
+        except Exception as e:
+            print(f"Error saving reasoning patterns: {e}")
     
     def identify_reasoning_type(self, query: str) -> Tuple[str, float]:
         """Identify the type of reasoning required with better pattern matching"""
         query_lower = query.lower()
         
-        # Direct pattern matching (more reliable than HDC for this)
-        patterns = {
-            'definition': ['what is', 'define', 'meaning of', 'explain what'],
-            'comparison': ['difference between', 'compare', 'versus', 'vs', 'contrast'],
-            'causation': ['why does', 'what causes', 'reason for', 'because', 'why'],
-            'process': ['how does', 'how do', 'steps to', 'process of', 'mechanism'],
-            'example': ['give example', 'examples of', 'for instance', 'such as'],
-            'application': ['how to use', 'apply', 'practical', 'in practice'],
-            'analysis': ['analyze', 'evaluate', 'assess', 'examine']
-        }
+        # Direct pattern matching (more reliable than HDC for this), all types in one pass
+        scores = REASONING_MATCHER.score(query_lower)
         
         best_match = 'definition'  # Default to definition, not general
         best_score = 0
         
-        for pattern_type, phrases in patterns.items():
-            score = 0
-            for phrase in phrases:
-                if phrase in query_lower:
-                    score += len(phrase.split())  # Longer phrases get higher scores
-            
+        for pattern_type, score in scores.items():
             if score > best_score:
                 best_score = score
                 best_match = pattern_type
@@ -0,0 +1,122 @@
+"""
+Relational (knowledge-graph) memory of subject-predicate-object triples
+"""
+import numpy as np
+from typing import Dict, List, Tuple
+from hdc_core import HDCCore, ItemMemory
+
+# Minimum cleanup similarity for an answer. Unrelated vectors score about 0.5
+# (max 0.524 seen); true hits in a full 32-triple chunk score 0.555 or more
+RECALL_THRESHOLD = 0.54
+
+class PredicatePartition:
+    """All triples sharing one predicate, superposed in fixed-size chunks"""
+    
+    def __init__(self, dim: int, chunk_size: int, backend=None):
+        self.dim = dim
+        self.chunk_size = chunk_size
+        self.triples = []
+        self.chunks = []          # Summed triple vectors, int32 accumulators
+        self.chunk_counts = []
+        self.subjects = ItemMemory(dim, backend)
+        self.objects = ItemMemory(dim, backend)
+        self._matrix = None
+    
+    def add(self, triple_vector: np.ndarray):
+        """Superpose a triple into the current chunk, opening a new one when full"""
+        if not self.chunks or self.chunk_counts[-1] >= self.chunk_size:
+            self.chunks.append(np.zeros(self.dim, dtype=np.int32))
+            self.chunk_counts.append(0)
+        
+        self.chunks[-1] += triple_vector.astype(np.int32)
+        self.chunk_counts[-1] += 1
+        self._matrix = None
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.stack(self.chunks)
+        return self._matrix
+
+class RelationStore:
+    """Stores triples and answers (subject, predicate, ?) / (?, predicate, object)
+    
+    Each triple is stored as bind(s, permute(o)): the permutation gives the
+    object its own role, so (s, p, o) and (o, p, s) stay distinct. The
+    predicate is not bound in; triples are partitioned per predicate, and each
+    partition superposes at most chunk_size triples per vector so unbinding
+    stays well above the noise floor. A query unbinds every chunk of one
+    partition at once and cleans all of them up against that predicate's
+    codebook in a single batched lookup.
+    """
+    
+    def __init__(self, hdc_core: HDCCore, chunk_size: int = 32):
+        self.hdc = hdc_core
+        self.chunk_size = chunk_size
+        self.partitions = {}
+    
+    def add_relation(self, subject: str, predicate: str, obj: str):
+        """Store one subject-predicate-object triple"""
+        partition = self.partitions.get(predicate)
+        if partition is None:
+            partition = PredicatePartition(self.hdc.dim, self.chunk_size, self.hdc.backend)
+            self.partitions[predicate] = partition
+        
+        s_vec = self.hdc.create_concept_vector(subject)
+        o_vec = self.hdc.create_concept_vector(obj)
+        
+        # The object is permuted into its own role: plain binding commutes and
+        # would store (s, p, o) and (o, p, s) identically
+        triple_vector = self.hdc.bind(s_vec, self.hdc.permute(o_vec))
+        partition.add(triple_vector)
+        partition.triples.append((subject, predicate, obj))
+        partition.subjects.add(subject, s_vec)
+        partition.objects.add(obj, o_vec)
+    
+    def add_relations(self, relations: List[Tuple[str, str, str]]) -> int:
+        """Store many triples"""
+        for subject, predicate, obj in relations:
+            self.add_relation(subject, predicate, obj)
+        return len(relations)
+    
+    def _query(self, partition: PredicatePartition, known_vec: np.ndarray, codebook: ItemMemory,
+               top_k: int, threshold: float, unpermute: bool = False) -> List[Tuple[str, float]]:
+        """Unbind the known role from every chunk and clean up in one pass"""
+        # Unbinding is its own inverse for bipolar vectors
+        unbound = partition.matrix * known_vec
+        noisy = np.where(unbound > 0, 1, -1)
+        if unpermute:
+            # Objects were stored permuted; undo it (HDCCore.permute shifts by 1)
+            noisy = np.roll(noisy, -1, axis=1)
+        
+        # chunks x codebook similarities; each entry's best chunk is its score
+        scores = codebook.batch_similarities(noisy).max(axis=0)
+        hits = np.flatnonzero(scores > threshold)
+        order = hits[np.argsort(-scores[hits], kind='stable')][:top_k]
+        return [(codebook.keys[i], float(scores[i])) for i in order]
+    
+    def query_objects(self, subject: str, predicate: str, top_k: int = 3,
+                      threshold: float = RECALL_THRESHOLD) -> List[Tuple[str, float]]:
+        """What does subject relate to via predicate? Most likely objects first"""
+        partition = self.partitions.get(predicate)
+        if partition is None:
+            return []
+        subject_vec = self.hdc.create_concept_vector(subject)
+        return self._query(partition, subject_vec, partition.objects, top_k, threshold, unpermute=True)
+    
+    def query_subjects(self, predicate: str, obj: str, top_k: int = 3,
+                       threshold: float = RECALL_THRESHOLD) -> List[Tuple[str, float]]:
+        """What relates to obj via predicate? Most likely subjects first"""
+        partition = self.partitions.get(predicate)
+        if partition is None:
+            return []
+        object_vec = self.hdc.permute(self.hdc.create_concept_vector(obj))
+        return self._query(partition, object_vec, partition.subjects, top_k, threshold)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get relation store statistics"""
+        return {
+            'total_relations': sum(len(p.triples) for p in self.partitions.values()),
+            'total_predicates': len(self.partitions),
+            'total_chunks': sum(len(p.chunks) for p in self.partitions.values())
+        }
@@ -0,0 +1,148 @@
+"""
+Headless HTTP/JSON query service over the shared TutorEngine
+"""
+import json
+import argparse
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Tuple
+from engine import TutorEngine, load_engine, DEFAULT_STORAGE_PATH
+
+MAX_BATCH_SIZE = 256
+MAX_BODY_BYTES = 1 << 20
+
+def _to_json(value: Any) -> Any:
+    """Convert NumPy scalars/arrays left in engine results to plain Python"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Routes: GET /health, GET /stats, POST /query, POST /batch"""
+    
+    server_version = "HypercentaurHTTP/1.0"
+    protocol_version = "HTTP/1.1"
+    
+    @property
+    def engine(self) -> TutorEngine:
+        return self.server.engine
+    
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {
+                'status': 'ok',
+                'items': len(self.engine.vector_store.metadata)
+            })
+        elif self.path == '/stats':
+            self._send_json(200, {
+                'knowledge_base': self.engine.get_stats(),
+                'queries': self.engine.query_processor.get_stats()
+            })
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+    
+    def do_POST(self):
+        if self.path not in ('/query', '/batch'):
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+            return
+        
+        status, payload = self._read_json()
+        if status != 200:
+            self._send_json(status, payload)
+            return
+        
+        if self.path == '/query':
+            query = payload.get('query')
+            if not isinstance(query, str) or not query.strip():
+                self._send_json(400, {'error': "Expected a non-empty 'query' string"})
+                return
+            
+            self._send_json(200, self.engine.process_query(query))
+        else:
+            queries = payload.get('queries')
+            if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                self._send_json(400, {'error': "Expected 'queries' as a list of strings"})
+                return
+            if len(queries) > MAX_BATCH_SIZE:
+                self._send_json(413, {'error': f"At most {MAX_BATCH_SIZE} queries per batch"})
+                return
+            
+            results = [self.engine.process_query(query) for query in queries]
+            self._send_json(200, {'results': results})
+    
+    def _read_json(self) -> Tuple[int, Dict[str, Any]]:
+        """Read and decode the JSON request body
+        
+        Whenever the body is not read, the connection is closed after the
+        response, so leftover body bytes are never parsed as a new request.
+        """
+        if 'Transfer-Encoding' in self.headers:
+            self.close_connection = True
+            return 411, {'error': "Content-Length required"}
+        
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            self.close_connection = True
+            return 400, {'error': "Invalid Content-Length"}
+        
+        if length < 0:
+            self.close_connection = True
+            return 400, {'error': "Invalid Content-Length"}
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return 413, {'error': "Request body too large"}
+        
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return 400, {'error': f"Invalid JSON: {e}"}
+        
+        if not isinstance(payload, dict):
+            return 400, {'error': "Expected a JSON object"}
+        
+        return 200, payload
+    
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, default=_to_json).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+def create_server(engine: TutorEngine, host: str = '127.0.0.1', port: int = 8000,
+                  access_log: bool = False) -> ThreadingHTTPServer:
+    """Create a threaded HTTP server bound to one shared engine"""
+    server = ThreadingHTTPServer((host, port), QueryRequestHandler)
+    server.daemon_threads = True
+    server.engine = engine
+    server.access_log = access_log
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve QueryProcessor over HTTP/JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--store', default=DEFAULT_STORAGE_PATH, help="vector store path")
+    parser.add_argument('--access-log', action='store_true', help="log every request")
+    args = parser.parse_args()
+    
+    server = create_server(load_engine(args.store), args.host, args.port, args.access_log)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,168 @@
+"""
+Sharded HDC search - items partitioned across worker processes with
+memmapped shard files, queries scattered and top-k results merged
+
+Each shard is pinned to its own single-process pool, so a worker only ever
+maps its own partition.
+"""
+import os
+import heapq
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Optional
+from hdc_core import HDCCore
+from vector_store import VectorStore
+
+# Per-worker cache of opened shards: path -> (store version, matrix memmap, row norms)
+_open_shards = {}
+
+def _load_shard(shard_path: str, version: int, hdc: HDCCore) -> Tuple[np.ndarray, np.ndarray]:
+    """Memmap a shard once per worker process, unmapping shards of older versions"""
+    for path in [path for path, entry in _open_shards.items() if entry[0] != version]:
+        del _open_shards[path]  # Releases the memmap so the deleted file's space is freed
+    
+    if shard_path not in _open_shards:
+        matrix = np.load(shard_path, mmap_mode='r')
+        row_norms = hdc.row_norms(matrix)
+        _open_shards[shard_path] = (version, matrix, row_norms)
+    return _open_shards[shard_path][1:]
+
+def _search_shard(shard_path: str, version: int, first_row: int, query_vector: np.ndarray,
+                  top_k: int, threshold: float, backend: str = "numpy") -> List[Tuple[float, int]]:
+    """Score one shard; returns (score, global row) for its local top_k"""
+    hdc = HDCCore(dim=len(query_vector), backend=backend)
+    matrix, row_norms = _load_shard(shard_path, version, hdc)
+    if len(matrix) == 0:
+        return []
+    
+    hamming_sims = hdc.batch_hamming_similarity(query_vector, matrix)
+    cosine_sims = hdc.batch_similarity(query_vector, matrix, row_norms)
+    scores = np.maximum(hamming_sims, (cosine_sims + 1) / 2)
+    
+    # Same ordering as VectorStore.search_similar: score, then insertion order
+    order = np.argsort(-scores, kind='stable')[:top_k]
+    return [(float(scores[row]), first_row + int(row)) for row in order if scores[row] >= threshold]
+
+class ShardSet:
+    """Shard files of one store snapshot, deleted once retired and unused"""
+    
+    def __init__(self, snapshot, shards: List[Tuple[str, int]]):
+        self.snapshot = snapshot
+        self.shards = shards  # (shard path, first global row)
+        self.active = 0       # Searches currently using the files
+        self.retired = False  # Replaced by a newer ShardSet
+    
+    def remove_files(self):
+        for path, _ in self.shards:
+            if os.path.exists(path):
+                os.remove(path)
+
+class ShardedVectorStore:
+    """Scatter-gather search over a VectorStore split into num_shards processes
+    
+    Every search checks the store's snapshot version and rebuilds the shards
+    when it changed. Snapshot and shard files are published together, and
+    the files of a replaced version are deleted after its last search ends.
+    """
+    
+    def __init__(self, vector_store: VectorStore, num_shards: Optional[int] = None,
+                 shard_dir: str = "vector_shards"):
+        self.vector_store = vector_store
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.shard_dir = shard_dir
+        self._shard_set = None
+        self._lock = threading.Lock()          # Guards _shard_set and its counters
+        self._refresh_lock = threading.Lock()  # One rebuild at a time
+        # One single-process pool per shard: shard i always runs on worker i
+        self._executors = [ProcessPoolExecutor(max_workers=1) for _ in range(self.num_shards)]
+        
+        self.refresh()
+    
+    @property
+    def snapshot(self):
+        return self._shard_set.snapshot if self._shard_set else None
+    
+    @property
+    def shards(self) -> List[Tuple[str, int]]:
+        return self._shard_set.shards if self._shard_set else []
+    
+    def refresh(self) -> bool:
+        """Rewrite the shard files if the store changed since they were built"""
+        with self._refresh_lock:
+            snapshot = self.vector_store.snapshot()
+            current = self._shard_set
+            if current is not None and snapshot.version == current.snapshot.version:
+                return False
+            
+            os.makedirs(self.shard_dir, exist_ok=True)
+            
+            # Contiguous partitions keep global row order, so ties merge like a single scan
+            shards = []
+            bounds = np.linspace(0, len(snapshot.keys), self.num_shards + 1).astype(int)
+            for i in range(self.num_shards):
+                # Versioned names so workers never read a stale memmap
+                path = os.path.join(self.shard_dir, f"shard_v{snapshot.version}_{i}.npy")
+                np.save(path, snapshot.matrix[bounds[i]:bounds[i + 1]])
+                shards.append((path, int(bounds[i])))
+            
+            self._publish(ShardSet(snapshot, shards))
+        
+        print(f"Built {self.num_shards} shards for {len(snapshot.keys)} vectors")
+        return True
+    
+    def _publish(self, shard_set: Optional[ShardSet]):
+        """Swap in a new shard set; the old files go once no search uses them"""
+        with self._lock:
+            old, self._shard_set = self._shard_set, shard_set
+            if old is None:
+                return
+            old.retired = True
+            remove = old.active == 0
+        if remove:
+            old.remove_files()
+    
+    def _acquire(self) -> ShardSet:
+        """Current shard set, rebuilt first if the store has a newer snapshot"""
+        shard_set = self._shard_set
+        if shard_set is None or self.vector_store.snapshot().version != shard_set.snapshot.version:
+            self.refresh()
+        
+        with self._lock:
+            shard_set = self._shard_set
+            shard_set.active += 1
+        return shard_set
+    
+    def _release(self, shard_set: ShardSet):
+        with self._lock:
+            shard_set.active -= 1
+            remove = shard_set.retired and shard_set.active == 0
+        if remove:
+            shard_set.remove_files()
+    
+    def search_similar(self, query_vector: np.ndarray, top_k: int = 5,
+                       threshold: float = 0.1) -> List[Tuple[str, float, Dict]]:
+        """Scatter the query to every shard, gather local top_k, merge with a heap"""
+        shard_set = self._acquire()
+        snapshot = shard_set.snapshot
+        try:
+            futures = [executor.submit(_search_shard, path, snapshot.version, first_row, query_vector,
+                                       top_k, threshold, self.vector_store.hdc.backend.name)
+                       for executor, (path, first_row) in zip(self._executors, shard_set.shards)]
+            
+            candidates = []
+            for future in futures:
+                candidates.extend(future.result())
+        finally:
+            self._release(shard_set)
+        
+        best = heapq.nsmallest(top_k, candidates, key=lambda c: (-c[0], c[1]))
+        
+        return [(snapshot.keys[row], score, snapshot.metadata.get(snapshot.keys[row], {}))
+                for score, row in best]
+    
+    def close(self):
+        """Stop the workers and delete the shard files"""
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+        self._publish(None)
@@ -0,0 +1,24 @@
+import os
+import sys
+import pytest
+
+# Modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def make_items():
+    """Factory for small processed knowledge-base items"""
+    def make(count: int, offset: int = 0):
+        return [{'question': f"what is concept{i} in psychology",
+                 'answer': f"concept{i} is a topic number {i}",
+                 'topic': f"topic{i % 3}", 'difficulty': 'basic',
+                 'concepts': [f"concept{i}"]} for i in range(offset, offset + count)]
+    return make
+
+@pytest.fixture(scope="session")
+def knowledge_items():
+    """The bundled psychology knowledge base, preprocessed as engine.py does"""
+    from data_loader import DataLoader
+    loader = DataLoader()
+    loader.load_psych_dataset()
+    return loader.preprocess_data()
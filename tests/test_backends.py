@@ -0,0 +1,28 @@
+"""
+Optional array backends must match NumpyBackend
+"""
+import numpy as np
+import pytest
+from hdc_backends import BLOCK_ROWS, NumpyBackend, get_backend
+
+@pytest.fixture(scope="module")
+def torch_backend():
+    pytest.importorskip("torch")
+    return get_backend("torch")
+
+@pytest.mark.parametrize("dtype", [np.int8, np.int64, np.float16])
+def test_torch_matches_numpy(torch_backend, dtype):
+    rng = np.random.RandomState(0)
+    # More than one block, so the block-by-block widening is exercised
+    matrix = rng.choice([-1, 1], size=(BLOCK_ROWS + 37, 512)).astype(dtype)
+    matrix.flags.writeable = False  # Stored snapshots and memmaps are read-only
+    query = rng.choice([-1, 1], size=512)
+    queries = rng.choice([-1, 1], size=(3, 512)).astype(np.float64)
+    numpy_backend = NumpyBackend()
+    
+    assert np.array_equal(torch_backend.dot(query, matrix), numpy_backend.dot(query, matrix))
+    assert np.array_equal(torch_backend.dot(queries, matrix), numpy_backend.dot(queries, matrix))
+    assert np.allclose(torch_backend.batch_similarity(query, matrix),
+                       numpy_backend.batch_similarity(query, matrix))
+    assert np.array_equal(torch_backend.batch_hamming_similarity(query, matrix),
+                          numpy_backend.batch_hamming_similarity(query, matrix))
@@ -0,0 +1,33 @@
+"""
+HDCCore kernels on compact (int8 / float16) storage dtypes
+"""
+import numpy as np
+import pytest
+from hdc_core import HDCCore
+from vector_store import compact_vector
+
+def test_int8_self_similarity_is_one():
+    hdc = HDCCore(dim=10000)
+    vector = compact_vector(hdc.generate_random_vector(seed=1))
+    assert vector.dtype == np.int8
+    assert hdc.similarity(vector, vector) == 1.0
+
+def test_compact_similarity_matches_int64():
+    hdc = HDCCore(dim=10000)
+    vec1, vec2 = hdc.generate_random_vector(seed=1), hdc.generate_random_vector(seed=2)
+    expected = hdc.similarity(vec1, vec2)
+    assert hdc.similarity(compact_vector(vec1), compact_vector(vec2)) == expected
+    assert hdc.similarity(vec1.astype(np.float16), vec2.astype(np.float16)) == expected
+
+def test_store_memory_rejects_wrong_length():
+    hdc = HDCCore(dim=100)
+    hdc.store_memory('a', hdc.generate_random_vector(seed=1))
+    with pytest.raises(ValueError):
+        hdc.store_memory('b', np.ones(5))
+    assert list(hdc.memory_bank) == ['a']
+    assert [key for key, _ in hdc.query_memory(hdc.memory_bank['a'])] == ['a']
+
+def test_cleanup_scores_mismatched_candidates_zero():
+    hdc = HDCCore(dim=100)
+    vector = hdc.generate_random_vector(seed=1)
+    assert hdc.cleanup_memory(vector, [np.ones(5), vector]) is vector
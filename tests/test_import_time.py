@@ -0,0 +1,34 @@
+"""
+Import-time budget: the core engine must load with NumPy alone
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Generous for slow CI machines; heavy optional imports (torch, pandas) take seconds
+IMPORT_BUDGET_SECONDS = 2.0
+OPTIONAL_MODULES = ('torch', 'pandas', 'transformers', 'sentence_transformers', 'datasets')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import engine
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'loaded': [name for name in %r if name in sys.modules]}))
+"""
+
+def _import_engine() -> dict:
+    """Import engine in a fresh interpreter and report time and optional modules"""
+    output = subprocess.run([sys.executable, '-c', PROBE % (OPTIONAL_MODULES,)], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def test_engine_import_skips_optional_dependencies():
+    assert _import_engine()['loaded'] == []
+
+def test_engine_import_within_budget():
+    # Best of three, so one cold disk cache does not fail the run
+    elapsed = min(_import_engine()['elapsed'] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET_SECONDS, f"import engine took {elapsed:.2f}s"
@@ -0,0 +1,65 @@
+"""
+PsychologyIndex scores entries exactly like the original nested keyword loops
+"""
+import random
+import re
+import pytest
+
+pytest.importorskip("streamlit")
+import main
+
+def reference_scores(query_keywords, entries):
+    """The original SimpleHypercentaur._find_best_match scoring, per entry"""
+    results = []
+    for entry in entries:
+        score = 0
+        matched_keywords = []
+        
+        for query_kw in query_keywords:
+            for entry_kw in entry['keywords']:
+                if query_kw.lower() == entry_kw.lower():
+                    score += 20
+                    matched_keywords.append(query_kw)
+        
+        for query_kw in query_keywords:
+            for entry_kw in entry['keywords']:
+                if query_kw.lower() in entry_kw.lower() or entry_kw.lower() in query_kw.lower():
+                    if query_kw not in matched_keywords:
+                        score += 10
+                        matched_keywords.append(query_kw)
+        
+        for text, points in ((entry['question'].lower(), 8), (entry['answer'].lower(), 3)):
+            for query_kw in query_keywords:
+                if query_kw.lower() in text and query_kw not in matched_keywords:
+                    score += points
+                    matched_keywords.append(query_kw)
+        
+        if len(matched_keywords) > 1:
+            score += len(matched_keywords) * 5
+        results.append((score, matched_keywords))
+    return results
+
+def test_index_matches_reference_scoring():
+    entries = main.PSYCHOLOGY_DB
+    words = set()
+    for entry in entries:
+        words.update(entry['keywords'])
+        words.update(re.findall(r'\w+', (entry['question'] + ' ' + entry['answer']).lower()))
+    words = sorted(words)
+    
+    rng = random.Random(1)
+    # Word fragments exercise partial matches in both directions
+    fragments = [word[:rng.randint(1, len(word))] for word in words] + \
+                [word[rng.randint(0, len(word) - 1):] for word in words] + ['xyzq', 'distress', 'memorys']
+    hypercentaur = main.SimpleHypercentaur()
+    
+    for _ in range(300):
+        query = ' '.join(rng.choice(words + fragments) for _ in range(rng.randint(1, 6)))
+        if rng.random() < 0.2:
+            query += ' ' + query  # Repeated keywords
+        keywords = hypercentaur._extract_keywords(query)
+        
+        expected = reference_scores(keywords, entries)
+        scored = {idx: (score, matched) for idx, score, matched in main.PSYCHOLOGY_INDEX.score_entries(keywords)}
+        for idx, (score, matched) in enumerate(expected):
+            assert scored.get(idx, (0, [])) == (score, matched), query
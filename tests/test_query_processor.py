@@ -0,0 +1,114 @@
+"""
+QueryProcessor behaviour shared across users and store versions
+"""
+import random
+from hdc_core import HDCCore
+from vector_store import VectorStore
+from reasoning_engine import ReasoningEngine
+from query_processor import QueryProcessor, PSYCHOLOGY_KEYWORDS
+
+def make_processor(tmp_path, items, **kwargs) -> QueryProcessor:
+    hdc = HDCCore(dim=512)
+    store = VectorStore(hdc, str(tmp_path / "store.pkl"))
+    store.store_data(items)
+    return QueryProcessor(hdc, store, ReasoningEngine(hdc), **kwargs)
+
+def test_history_recording_can_be_disabled(tmp_path, make_items):
+    shared = make_processor(tmp_path, make_items(10), record_history=False)
+    assert shared.process_query("what is concept3")['response']
+    assert shared.get_query_history() == []
+    
+    recording = make_processor(tmp_path, make_items(10))
+    recording.process_query("what is concept3")
+    assert [entry['query'] for entry in recording.get_query_history()] == ["what is concept3"]
+
+def reference_matches(query, data):
+    """The original four sequential full-scan tiers of _find_best_matches"""
+    query_lower = query.lower().strip()
+    query_words = []
+    for word in query_lower.split():
+        clean_word = ''.join(c for c in word if c.isalpha())
+        if len(clean_word) > 2 and clean_word not in ['the', 'what', 'how', 'why', 'when', 'where', 'who',
+                                                      'does', 'can', 'will', 'are', 'and', 'but', 'for']:
+            query_words.append(clean_word)
+    
+    # Direct content search
+    matches = []
+    for item in data:
+        question = item.get('question', '').lower()
+        concepts = ' '.join(item.get('concepts', [])).lower()
+        all_content = f"{question} {item.get('answer', '').lower()} {item.get('topic', '').lower()} {concepts}"
+        relevance, matched_words = 0, []
+        for word in query_words:
+            if word in all_content:
+                relevance += 10 + 20 * (word in question) + 15 * (word in concepts)
+                matched_words.append(word)
+        if relevance > 0:
+            matches.append(dict(item.copy(), relevance=relevance, matched_words=matched_words))
+    
+    # Topic mapping
+    if not matches:
+        for keyword, related_terms in PSYCHOLOGY_KEYWORDS.items():
+            if keyword in query_lower:
+                for item in data:
+                    content = f"{item.get('question', '')} {item.get('answer', '')} {item.get('topic', '')}".lower()
+                    count = sum(1 for term in related_terms if term in content)
+                    if count > 0:
+                        matches.append(dict(item.copy(), relevance=count * 10 + 20, match_type=f'topic_{keyword}'))
+    
+    # Fuzzy matching
+    if not matches:
+        for item in data:
+            content = f"{item.get('question', '')} {item.get('answer', '')} {' '.join(item.get('concepts', []))}".lower()
+            fuzzy_score = 0
+            for query_word in query_words:
+                for content_word in content.split():
+                    if len(query_word) > 3 and len(content_word) > 3:
+                        if query_word in content_word or content_word in query_word:
+                            fuzzy_score += 5
+                        elif query_word[:3] == content_word[:3] and len(query_word) > 4:
+                            fuzzy_score += 3
+            if fuzzy_score > 0:
+                matches.append(dict(item.copy(), relevance=fuzzy_score + 10, match_type='fuzzy'))
+    
+    # Emergency fallback
+    if not matches:
+        for item in data:
+            answer = item.get('answer', '')
+            score = len(answer.split())
+            if 'psychology' in answer.lower() or 'psychological' in answer.lower():
+                score += 50
+            if len(answer) > 200:
+                score += 30
+            matches.append(dict(item.copy(), relevance=score, match_type='emergency_fallback'))
+        matches.sort(key=lambda x: x['relevance'], reverse=True)
+        matches = matches[:3]
+    
+    matches.sort(key=lambda x: x.get('relevance', 0), reverse=True)
+    return matches[:5]
+
+def test_fallback_tiers_match_reference(tmp_path, knowledge_items):
+    processor = make_processor(tmp_path, knowledge_items)
+    snapshot = processor.vector_store.snapshot()
+    data = list(snapshot.metadata.values())
+    
+    words = set()
+    for item in data:
+        words.update((item['question'] + ' ' + item['answer']).lower().split())
+    words = sorted(words) + ['zzzz', 'qqqqq', 'memorize', 'psychologic', 'xyzlearn', 'qqgrowzz', 'wants']
+    
+    rng = random.Random(1)
+    queries = ["What is classical conditioning?", "zzzz qqqqq", "memorize stuff", "xylophone",
+               "qqstresszz", "xxmotivatzz", "qqgrowzz"]
+    for _ in range(150):
+        queries.append(' '.join(rng.choice(words) for _ in range(rng.randint(1, 4))))
+        queries.append(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz ') for _ in range(rng.randint(3, 20))))
+    
+    tiers = set()
+    for query in queries:
+        expected = reference_matches(query, data)
+        assert processor._find_best_matches(query, data, snapshot.version) == expected, query
+        tiers.add(expected[0].get('match_type', 'direct').split('_')[0] if expected else None)
+    
+    # The queries reach every tier
+    assert {'direct', 'topic', 'fuzzy', 'emergency'} <= tiers
@@ -0,0 +1,30 @@
+"""
+Reasoning pattern cache: written on demand, rebuilt when stale
+"""
+import numpy as np
+import reasoning_engine
+from hdc_core import HDCCore
+from reasoning_engine import ReasoningEngine
+
+def test_pattern_cache_round_trip(tmp_path):
+    path = str(tmp_path / "patterns.npz")
+    hdc = HDCCore(dim=1000)
+    built = ReasoningEngine(hdc, path).build_pattern_cache()
+    
+    loaded = ReasoningEngine(hdc, path)._load_reasoning_patterns()
+    assert loaded is not None
+    for pattern_type, pattern in built.items():
+        assert np.array_equal(loaded[pattern_type]['combined'], pattern['combined'])
+
+def test_pattern_cache_stale_after_phrase_change(tmp_path, monkeypatch):
+    path = str(tmp_path / "patterns.npz")
+    hdc = HDCCore(dim=1000)
+    ReasoningEngine(hdc, path).build_pattern_cache()
+    
+    phrases = dict(reasoning_engine.PATTERN_PHRASES, example=['give example', 'for example'])
+    monkeypatch.setattr(reasoning_engine, 'PATTERN_PHRASES', phrases)
+    assert ReasoningEngine(hdc, path)._load_reasoning_patterns() is None
+    assert len(ReasoningEngine(hdc, path).reasoning_patterns['example']['vectors']) == 2
+    
+    # Dimension changes invalidate it too
+    assert ReasoningEngine(HDCCore(dim=500), path)._load_reasoning_patterns() is None
@@ -0,0 +1,26 @@
+"""
+RelationStore: direction-aware recall on the core's backend
+"""
+from hdc_core import HDCCore
+from hdc_backends import NumpyBackend, register_backend
+from relation_store import RelationStore
+
+def test_relation_direction_and_unknowns():
+    store = RelationStore(HDCCore(dim=4000))
+    store.add_relations([('freud', 'mentored', 'jung'), ('jung', 'influenced', 'rogers'),
+                         ('adler', 'studied_with', 'freud')])
+    
+    assert [name for name, _ in store.query_objects('freud', 'mentored')] == ['jung']
+    assert [name for name, _ in store.query_subjects('mentored', 'jung')] == ['freud']
+    # (jung, mentored, freud) was never stored
+    assert store.query_objects('jung', 'mentored') == []
+    assert store.query_objects('nobody', 'influenced') == []
+
+def test_partitions_use_core_backend():
+    register_backend('relation-test', NumpyBackend)  # A distinct instance from the default
+    hdc = HDCCore(dim=1000, backend='relation-test')
+    store = RelationStore(hdc)
+    store.add_relation('freud', 'mentored', 'jung')
+    partition = store.partitions['mentored']
+    assert partition.subjects.backend is hdc.backend
+    assert partition.objects.backend is hdc.backend
@@ -0,0 +1,67 @@
+"""
+Search shortcuts return exactly what the full computation does: compact
+storage dtypes vs int64, and early-terminating scans vs full scans
+"""
+import numpy as np
+import pytest
+from hdc_core import HDCCore, ItemMemory, bounded_match_counts
+from vector_store import VectorStore
+
+QUERIES = ["what is classical conditioning", "how does stress affect memory",
+           "explain cognitive dissonance", "piaget stages of development", "a"]
+SEARCHES = [(1, 0.1), (3, 0.5), (5, 0.52), (50, 0.0), (5, 0.9)]
+
+@pytest.fixture(scope="module")
+def stores(tmp_path_factory, knowledge_items):
+    hdc = HDCCore(dim=2000)
+    path = tmp_path_factory.mktemp("stores")
+    compact = VectorStore(hdc, str(path / "compact.pkl"))
+    compact.store_data(knowledge_items)
+    wide = VectorStore(hdc, str(path / "wide.pkl"), vector_dtype='int64')
+    wide.store_data(knowledge_items)
+    return compact, wide
+
+def test_compact_storage_matches_int64(stores):
+    compact, wide = stores
+    assert compact.snapshot().matrix.dtype == np.int8
+    assert wide.snapshot().matrix.dtype == np.int64
+    
+    for text in QUERIES:
+        query = compact.create_query_vector(text)
+        for top_k, threshold in SEARCHES:
+            assert compact.search_similar(query, top_k, threshold) == wide.search_similar(query, top_k, threshold)
+        assert compact.search_cascade(query, 5) == wide.search_cascade(query, 5)
+        assert compact.search_hierarchical(query, 5) == wide.search_hierarchical(query, 5)
+
+def test_early_stop_matches_full_search(stores):
+    store, _ = stores
+    topic = store.snapshot().records[0]['topic']
+    
+    for text in QUERIES:
+        query = store.create_query_vector(text)
+        for top_k, threshold in SEARCHES:
+            assert (store.search_similar(query, top_k, threshold, early_stop=True)
+                    == store.search_similar(query, top_k, threshold))
+            assert (store.search_similar(query, top_k, threshold, topic=topic, early_stop=True)
+                    == store.search_similar(query, top_k, threshold, topic=topic))
+
+def test_early_stop_matches_full_recall():
+    rng = np.random.default_rng(0)
+    dim = 2000
+    matrix = rng.choice(np.array([-1, 1], dtype=np.int8), (3000, dim))
+    memory = ItemMemory(dim)
+    for key, vector in enumerate(matrix):
+        memory.add(key, vector)
+    
+    for flip_rate in (0.05, 0.2, 0.4):
+        query = matrix[rng.integers(len(matrix))].astype(np.int64)
+        query[rng.random(dim) < flip_rate] *= -1
+        
+        for threshold, top_k in [(0.3, None), (0.55, None), (0.5, 5), (0.3, 1), (-1, 3)]:
+            assert memory.recall(query, threshold, top_k, early_stop=True) == memory.recall(query, threshold, top_k)
+        
+        # Survivors carry their exact full match counts
+        rows, matches = bounded_match_counts(query, matrix, min_matches=0.5 * dim, chunk_size=256)
+        full = np.count_nonzero(matrix == query, axis=1)
+        assert np.array_equal(rows, np.flatnonzero(full >= 0.5 * dim))
+        assert np.array_equal(matches, full[rows])
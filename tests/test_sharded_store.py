@@ -0,0 +1,43 @@
+"""
+ShardedVectorStore: results match the single store across store updates
+"""
+import os
+import numpy as np
+from hdc_core import HDCCore
+from vector_store import VectorStore
+from sharded_store import ShardedVectorStore
+
+def test_search_follows_store_updates(tmp_path, make_items):
+    hdc = HDCCore(dim=512)
+    store = VectorStore(hdc, str(tmp_path / "store.pkl"))
+    store.store_data(make_items(30))
+    sharded = ShardedVectorStore(store, num_shards=2, shard_dir=str(tmp_path / "shards"))
+    try:
+        query = store.create_query_vector("what is concept7")
+        old_paths = [path for path, _ in sharded.shards]
+        
+        # No refresh() call: the search itself notices the new snapshot
+        store.store_data(make_items(10, offset=30))
+        results = sharded.search_similar(query, top_k=5)
+        expected = store.search_similar(query, top_k=5)
+        assert [r[:2] for r in results] == [r[:2] for r in expected]
+        assert sharded.snapshot.version == store.snapshot().version
+        assert not any(os.path.exists(path) for path in old_paths)
+    finally:
+        sharded.close()
+
+def test_retired_shards_kept_until_search_ends(tmp_path, make_items):
+    hdc = HDCCore(dim=512)
+    store = VectorStore(hdc, str(tmp_path / "store.pkl"))
+    store.store_data(make_items(30))
+    sharded = ShardedVectorStore(store, num_shards=2, shard_dir=str(tmp_path / "shards"))
+    try:
+        in_flight = sharded._acquire()
+        store.store_data(make_items(10, offset=30))
+        sharded.refresh()
+        assert all(os.path.exists(path) for path, _ in in_flight.shards)
+        
+        sharded._release(in_flight)
+        assert not any(os.path.exists(path) for path, _ in in_flight.shards)
+    finally:
+        sharded.close()
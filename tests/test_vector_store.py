@@ -0,0 +1,56 @@
+"""
+VectorStore persistence with memory-mapped vector matrices
+"""
+import shutil
+import numpy as np
+import pytest
+import vector_store
+from hdc_core import HDCCore
+from vector_store import VectorStore
+
+def test_mmap_round_trip(tmp_path, make_items):
+    hdc = HDCCore(dim=512)
+    path = str(tmp_path / "store.pkl")
+    store = VectorStore(hdc, path, mmap_vectors=True)
+    store.store_data(make_items(20))
+    
+    reloaded = VectorStore(hdc, path, mmap_vectors=True)
+    assert reloaded.snapshot().keys == store.snapshot().keys
+    assert np.array_equal(reloaded.snapshot().matrix, store.snapshot().matrix)
+
+def test_torn_save_is_rejected(tmp_path, monkeypatch, make_items):
+    monkeypatch.setattr(vector_store, 'LOAD_RETRY_DELAY', 0)
+    hdc = HDCCore(dim=512)
+    path = str(tmp_path / "store.pkl")
+    store = VectorStore(hdc, path, mmap_vectors=True)
+    store.store_data(make_items(20))
+    shutil.copy(path, str(tmp_path / "old.pkl"))
+    
+    # New matrix (37 rows) renamed into place, pickle still the 20-key one
+    store.store_data(make_items(17, offset=20))
+    shutil.copy(str(tmp_path / "old.pkl"), path)
+    
+    reader = VectorStore(hdc, path, mmap_vectors=True)
+    assert reader.snapshot().keys == []
+    
+    query = hdc.generate_random_vector(seed=0)
+    assert reader.search_similar(query) == []
+
+def test_published_snapshot_is_read_only(tmp_path, make_items):
+    store = VectorStore(HDCCore(dim=512), str(tmp_path / "store.pkl"))
+    store.store_data(make_items(5))
+    snapshot = store.snapshot()
+    key = snapshot.keys[0]
+    
+    with pytest.raises(TypeError):
+        store.metadata[key] = {}
+    with pytest.raises(TypeError):
+        store.concept_index['concept0'] += ('extra',)
+    with pytest.raises(AttributeError):
+        store.topic_index['topic0'].append(key)
+    with pytest.raises(ValueError):
+        store.vectors[key][0] = 0
+    
+    # Writers still copy and republish
+    store.store_data(make_items(2, offset=5))
+    assert len(store.metadata) == 7 and len(snapshot.metadata) == 5
@@ -5,52 +5,362 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
 import pickle
 import os
-from hdc_core import HDCCore
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from functools import lru_cache
+from hdc_core import HDCCore, bounded_match_counts
+
+# Storage dtypes for item vectors. 'auto' picks the smallest integer type that
+# holds a vector exactly (int8 for bipolar vectors, int16 for unthresholded
+# bundles); float16 is lossy and only used when requested for weighted data.
+VECTOR_DTYPES = ('auto', 'int8', 'int16', 'int32', 'int64', 'float16', 'float32', 'float64')
+
+def _fits_integer(vector: np.ndarray, dtype: np.dtype) -> bool:
+    """True if every value of the vector is an integer within dtype's range"""
+    if vector.size == 0:
+        return True
+    if vector.dtype.kind == 'f' and not np.array_equal(vector, np.round(vector)):
+        return False
+    info = np.iinfo(dtype)
+    return info.min <= vector.min() and vector.max() <= info.max
+
+def compact_vector(vector: np.ndarray, dtype: Optional[str] = 'auto') -> np.ndarray:
+    """Cast an item vector to its storage dtype (None keeps it unchanged)"""
+    vector = np.asarray(vector)
+    if dtype is None:
+        return vector
+    
+    if dtype == 'auto':
+        if vector.dtype.kind in 'iub' or _fits_integer(vector, np.int64):
+            for candidate in (np.int8, np.int16, np.int32):
+                if _fits_integer(vector, candidate):
+                    return vector.astype(candidate, copy=False)
+        return vector
+    
+    target = np.dtype(dtype)
+    if target.kind == 'i' and not _fits_integer(vector, target):
+        raise ValueError(f"Vector values do not fit storage dtype {dtype}")
+    return vector.astype(target, copy=False)
+
+# Reads of a store caught mid-save (pickle and .npy out of step) are retried
+LOAD_ATTEMPTS = 5
+LOAD_RETRY_DELAY = 0.2
+
+def _file_identity(path: str) -> Tuple[int, int, int]:
+    """(inode, size, mtime) of a file; every rename-into-place changes it"""
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+# Most recent query encodings kept by create_query_vector
+QUERY_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=65536)
+def _clean_token(token: str) -> str:
+    """Keep only the alphabetic characters of a lower-cased query token"""
+    return ''.join(c for c in token if c.isalpha())
+
+# Query words ignored by lexical matching (direct tier and hybrid retriever)
+STOP_WORDS = frozenset({'the', 'what', 'how', 'why', 'when', 'where', 'who', 'does', 'can', 'will',
+                        'are', 'and', 'but', 'for'})
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased alphabetic words longer than 2 characters"""
+    tokens = []
+    for token in text.lower().split():
+        clean_token = _clean_token(token)
+        if len(clean_token) > 2:  # Only keep tokens longer than 2 characters
+            tokens.append(clean_token)
+    return tokens
+
+def extract_query_words(text: str) -> List[str]:
+    """Tokens of a query that take part in lexical matching"""
+    return [token for token in tokenize(text) if token not in STOP_WORDS]
+
+class ItemRecord(Mapping):
+    """Compact, read-only metadata for one stored item
+    
+    Behaves like the metadata dict it replaces (get, keys, items, copy) but
+    keeps no per-item __dict__, shares one interned string per topic,
+    difficulty and concept, and is handed out by searches without copying.
+    Call copy() for a mutable dict.
+    """
+    
+    __slots__ = ('key', 'question', 'answer', 'topic', 'difficulty', 'concepts')
+    _fields = __slots__
+    
+    def __init__(self, key: str, question: str, answer: str, topic: str, difficulty: str, concepts):
+        self.key = key
+        self.question = question
+        self.answer = answer
+        self.topic = sys.intern(topic)
+        self.difficulty = sys.intern(difficulty)
+        self.concepts = tuple(sys.intern(concept) for concept in concepts)
+    
+    @classmethod
+    def from_item(cls, key: str, item: Mapping) -> 'ItemRecord':
+        """Build a record from a processed data item or a saved metadata dict"""
+        return cls(key,
+                   item.get('question', ''),
+                   item.get('answer', ''),
+                   item.get('topic', 'General'),
+                   item.get('difficulty', 'basic'),
+                   item.get('concepts', []))
+    
+    def __getitem__(self, field: str):
+        if field not in self._fields:
+            raise KeyError(field)
+        return getattr(self, field)
+    
+    def __iter__(self):
+        return iter(self._fields)
+    
+    def __len__(self) -> int:
+        return len(self._fields)
+    
+    def __repr__(self) -> str:
+        return f"ItemRecord({self.key!r}, topic={self.topic!r}, question={self.question!r})"
+    
+    def copy(self) -> Dict[str, Any]:
+        """Mutable dict copy, as the old per-item metadata dicts were"""
+        data = dict(zip(self._fields, (getattr(self, field) for field in self._fields)))
+        data['concepts'] = list(self.concepts)
+        return data
+    
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, field) for field in self._fields))
+
+class StoreSnapshot:
+    """Immutable state of a VectorStore at one point in time
+    
+    Writers never modify a published snapshot; they build a new one and swap
+    it in, so a reader holding a snapshot always sees consistent vectors,
+    metadata, indexes and search structures.
+    """
+    
+    def __init__(self, hdc_core: HDCCore, vectors: Dict[str, np.ndarray], metadata: Dict[str, ItemRecord],
+                 concept_index: Dict[str, List[str]], topic_index: Dict[str, List[str]], version: int = 0,
+                 matrix: Optional[np.ndarray] = None):
+        # Read-only views: writes go through VectorStore.store_data, which
+        # copies them and publishes a new snapshot
+        for vector in vectors.values():
+            vector.flags.writeable = False
+        self.vectors = MappingProxyType(vectors)
+        self.metadata = MappingProxyType(metadata)
+        self.concept_index = MappingProxyType({concept: tuple(keys) for concept, keys in concept_index.items()})
+        self.topic_index = MappingProxyType({topic: tuple(keys) for topic, keys in topic_index.items()})
+        self.version = version
+        
+        # Stack stored vectors into one matrix for vectorized scoring
+        self.keys = list(vectors.keys())
+        self.key_rows = {key: row for row, key in enumerate(self.keys)}
+        
+        if matrix is not None:
+            # Already stacked in key order (e.g. a memory-mapped file) - no copy
+            self.matrix = matrix
+        elif self.keys:
+            self.matrix = np.stack([vectors[key] for key in self.keys])
+        else:
+            self.matrix = np.zeros((0, hdc_core.dim))
+        
+        self.row_norms = hdc_core.row_norms(self.matrix)
+        # All entries +/-1: enables partial-sum bounds (search_similar early_stop)
+        self.bipolar = bool(np.all(np.abs(self.matrix) == 1))
+        self.matrix.flags.writeable = False
+        self.row_norms.flags.writeable = False
+        
+        # Bundle the item vectors of each topic into one prototype vector
+        topic_prototypes = {}
+        for topic, keys in topic_index.items():
+            topic_vectors = [vectors[key] for key in keys if key in vectors]
+            if topic_vectors:
+                topic_prototypes[topic] = hdc_core.bundle(topic_vectors)
+                topic_prototypes[topic].flags.writeable = False
+        self.topic_prototypes = MappingProxyType(topic_prototypes)
+        
+        # Integer postings: sorted, unique matrix rows per concept and topic
+        self.records = [metadata.get(key) for key in self.keys]
+        self.concept_postings = {concept: self.rows_for_keys(keys, sort=True)
+                                 for concept, keys in concept_index.items()}
+        self.topic_postings = {topic: self.rows_for_keys(keys, sort=True)
+                               for topic, keys in topic_index.items()}
+        
+        # Bitmasks for filtered vector search, one per topic and difficulty
+        self.topic_masks = {}
+        for topic, rows in self.topic_postings.items():
+            mask = np.zeros(len(self.keys), dtype=bool)
+            mask[rows] = True
+            self.topic_masks[topic] = mask
+        
+        difficulties = np.array([record.difficulty if record is not None else '' for record in self.records])
+        self.difficulty_masks = {difficulty: difficulties == difficulty
+                                 for difficulty in dict.fromkeys(difficulties.tolist()) if difficulty}
+    
+    def filter_rows(self, topic: Optional[str] = None, difficulty: Optional[str] = None,
+                    concepts: Optional[List[str]] = None) -> Optional[np.ndarray]:
+        """Rows passing all given filters, or None when nothing is filtered"""
+        if topic is None and difficulty is None and not concepts:
+            return None
+        
+        mask = np.ones(len(self.keys), dtype=bool)
+        no_rows = np.zeros(len(self.keys), dtype=bool)
+        
+        if topic is not None:
+            mask &= self.topic_masks.get(topic, no_rows)
+        if difficulty is not None:
+            mask &= self.difficulty_masks.get(difficulty, no_rows)
+        if concepts:
+            concept_mask = np.zeros(len(self.keys), dtype=bool)
+            for concept in concepts:
+                concept_mask[self.concept_postings.get(concept, [])] = True
+            mask &= concept_mask
+        
+        return np.flatnonzero(mask)
+    
+    def match_rows(self, concepts: Optional[List[str]] = None, topics: Optional[List[str]] = None,
+                   match_all: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows matching concepts (OR, or AND with match_all) within any of topics
+        
+        Returns sorted rows and, per row, how many of the concepts it has.
+        """
+        empty = np.zeros(0, dtype=np.intp)
+        
+        if concepts:
+            postings = [self.concept_postings.get(concept, empty) for concept in dict.fromkeys(concepts)]
+            rows, counts = np.unique(np.concatenate(postings), return_counts=True)
+            if match_all:
+                keep = counts == len(postings)
+                rows, counts = rows[keep], counts[keep]
+        else:
+            rows = np.arange(len(self.keys))
+            counts = np.zeros(len(rows), dtype=np.intp)
+        
+        if topics is not None:
+            topic_rows = [self.topic_postings.get(topic, empty) for topic in topics]
+            keep = np.isin(rows, np.concatenate(topic_rows) if topic_rows else empty)
+            rows, counts = rows[keep], counts[keep]
+        
+        return rows, counts
+    
+    def rows_for_keys(self, keys, sort: bool = False) -> np.ndarray:
+        """Map stored keys to matrix rows, skipping unknown and repeated keys"""
+        rows = dict.fromkeys(self.key_rows[key] for key in keys if key in self.key_rows)
+        rows = np.fromiter(rows, dtype=np.intp, count=len(rows))
+        return np.sort(rows) if sort else rows
 
 class VectorStore:
-    def __init__(self, hdc_core: HDCCore, storage_path: str = "vector_store.pkl"):
+    def __init__(self, hdc_core: HDCCore, storage_path: str = "vector_store.pkl",
+                 mmap_vectors: bool = False, vector_dtype: Optional[str] = 'auto'):
         self.hdc = hdc_core
         self.storage_path = storage_path
-        self.vectors = {}
-        self.metadata = {}
-        self.concept_index = {}
-        self.topic_index = {}
+        
+        # Item vectors are stored compactly (see VECTOR_DTYPES); scoring widens
+        # them block by block, so results do not depend on the storage dtype
+        if vector_dtype is not None and vector_dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector dtype '{vector_dtype}' (choose from {', '.join(VECTOR_DTYPES)})")
+        self.vector_dtype = vector_dtype
+        
+        # With mmap_vectors the vector matrix is saved next to the pickle and
+        # memory-mapped read-only, so all processes share one copy of it
+        self.mmap_vectors = mmap_vectors
+        self.matrix_path = os.path.splitext(storage_path)[0] + "_vectors.npy"
+        
+        # Readers take self._snapshot once; writers serialize on the lock and swap
+        self._write_lock = threading.Lock()
+        self._snapshot = StoreSnapshot(hdc_core, {}, {}, {}, {})
+        
+        # Query encodings keyed by cleaned token tuple, least recently used first.
+        # They depend only on the HDC concept vectors, so store updates keep them valid
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
         
         # Load existing storage if available
         self.load_storage()
     
+    # Read-only views of the current snapshot (see StoreSnapshot); update the
+    # store through store_data or clear_storage
+    @property
+    def vectors(self) -> Mapping[str, np.ndarray]:
+        return self._snapshot.vectors
+    
+    @property
+    def metadata(self) -> Mapping[str, ItemRecord]:
+        return self._snapshot.metadata
+    
+    @property
+    def concept_index(self) -> Mapping[str, Tuple[str, ...]]:
+        return self._snapshot.concept_index
+    
+    @property
+    def topic_index(self) -> Mapping[str, Tuple[str, ...]]:
+        return self._snapshot.topic_index
+    
+    @property
+    def topic_prototypes(self) -> Mapping[str, np.ndarray]:
+        return self._snapshot.topic_prototypes
+    
+    def snapshot(self) -> StoreSnapshot:
+        """Current consistent state; stays valid while the store is updated"""
+        return self._snapshot
+    
+    def _publish(self, vectors: Dict[str, np.ndarray], metadata: Dict[str, ItemRecord],
+                 concept_index: Dict[str, List[str]], topic_index: Dict[str, List[str]],
+                 matrix: Optional[np.ndarray] = None):
+        """Build a new snapshot off to the side and atomically swap it in"""
+        self._snapshot = StoreSnapshot(self.hdc, vectors, metadata, concept_index, topic_index,
+                                       version=self._snapshot.version + 1, matrix=matrix)
+    
+    def _map_vectors(self, keys: List[str]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """Memory-map the saved matrix; per-key vectors are row views into it"""
+        matrix = np.load(self.matrix_path, mmap_mode='r')
+        vectors = {key: matrix[row] for row, key in enumerate(keys)}
+        return vectors, matrix
+    
     def store_data(self, data_items: List[Dict]) -> int:
         """Store processed data items as HDC vectors"""
         stored_count = 0
         
-        for i, item in enumerate(data_items):
-            try:
-                # Generate unique key
-                key = f"item_{i}_{hash(item.get('question', ''))}"
-                
-                # Create HDC representation
-                vector = self._create_item_vector(item)
-                
-                # Store vector and metadata
-                self.vectors[key] = vector
-                self.metadata[key] = {
-                    'question': item.get('question', ''),
-                    'answer': item.get('answer', ''),
-                    'topic': item.get('topic', 'General'),
-                    'difficulty': item.get('difficulty', 'basic'),
-                    'concepts': item.get('concepts', [])
-                }
-                
-                # Update indices
-                self._update_indices(key, item)
-                
-                stored_count += 1
-                
-            except Exception as e:
-                print(f"Error storing item {i}: {e}")
+        with self._write_lock:
+            # Copy-on-write: readers keep using the current snapshot meanwhile
+            current = self._snapshot
+            vectors = dict(current.vectors)
+            metadata = dict(current.metadata)
+            concept_index = {concept: list(keys) for concept, keys in current.concept_index.items()}
+            topic_index = {topic: list(keys) for topic, keys in current.topic_index.items()}
+            
+            for i, item in enumerate(data_items):
+                try:
+                    # Generate unique key
+                    key = f"item_{i}_{hash(item.get('question', ''))}"
+                    
+                    # Create HDC representation
+                    vector = compact_vector(self._create_item_vector(item), self.vector_dtype)
+                    
+                    # Store vector and metadata
+                    vectors[key] = vector
+                    metadata[key] = ItemRecord.from_item(key, item)
+                    
+                    # Update indices
+                    self._update_indices(concept_index, topic_index, key, item)
+                    
+                    stored_count += 1
+                    
+                except Exception as e:
+                    print(f"Error storing item {i}: {e}")
+            
+            self._publish(vectors, metadata, concept_index, topic_index)
+            
+            # Save to disk
+            self.save_storage()
+            
+            # Swap the in-memory matrix for the shared mapping just written
+            if self.mmap_vectors and os.path.exists(self.matrix_path):
+                mapped_vectors, matrix = self._map_vectors(self._snapshot.keys)
+                self._publish(mapped_vectors, metadata, concept_index, topic_index, matrix=matrix)
         
-        # Save to disk
-        self.save_storage()
         print(f"Stored {stored_count} items in vector store")
         
         return stored_count
@@ -98,126 +408,302 @@ class VectorStore:
         else:
             return np.zeros(self.hdc.dim)
     
-    def _update_indices(self, key: str, item: Dict):
+    def _update_indices(self, concept_index: Dict[str, List[str]], topic_index: Dict[str, List[str]],
+                        key: str, item: Dict):
         """Update concept and topic indices"""
         # Update concept index
         for concept in item.get('concepts', []):
-            if concept not in self.concept_index:
-                self.concept_index[concept] = []
-            self.concept_index[concept].append(key)
+            if concept not in concept_index:
+                concept_index[concept] = []
+            concept_index[concept].append(key)
         
         # Update topic index
         topic = item.get('topic', 'General')
-        if topic not in self.topic_index:
-            self.topic_index[topic] = []
-        self.topic_index[topic].append(key)
+        if topic not in topic_index:
+            topic_index[topic] = []
+        topic_index[topic].append(key)
     
-    def search_similar(self, query_vector: np.ndarray, top_k: int = 5, 
-                      threshold: float = 0.1) -> List[Tuple[str, float, Dict]]:
-        """Search for similar vectors with improved threshold"""
-        results = []
+    def _score(self, query_vector: np.ndarray, stored_vector: np.ndarray) -> float:
+        """Score a stored vector against a query vector"""
+        # Try both similarity measures
+        hamming_sim = self.hdc.hamming_similarity(query_vector, stored_vector)
+        cosine_sim = self.hdc.similarity(query_vector, stored_vector)
         
-        for key, stored_vector in self.vectors.items():
-            # Try both similarity measures
-            hamming_sim = self.hdc.hamming_similarity(query_vector, stored_vector)
-            cosine_sim = self.hdc.similarity(query_vector, stored_vector)
-            
-            # Use the better of the two similarities
-            similarity = max(hamming_sim, (cosine_sim + 1) / 2)  # Normalize cosine to [0,1]
-            
-            if similarity >= threshold:
-                metadata = self.metadata.get(key, {})
-                results.append((key, similarity, metadata))
+        # Use the better of the two similarities
+        return max(hamming_sim, (cosine_sim + 1) / 2)  # Normalize cosine to [0,1]
+    
+    def _score_rows(self, snapshot: StoreSnapshot, query_vector: np.ndarray,
+                    rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vectorized _score over selected rows of the snapshot matrix (None = all)"""
+        if rows is None:
+            # Score the matrix in place; fancy indexing would copy all of it
+            matrix, row_norms = snapshot.matrix, snapshot.row_norms
+        else:
+            matrix, row_norms = snapshot.matrix[rows], snapshot.row_norms[rows]
+        
+        hamming_sims = self.hdc.batch_hamming_similarity(query_vector, matrix)
+        cosine_sims = self.hdc.batch_similarity(query_vector, matrix, row_norms)
         
-        # Sort by similarity and return top_k
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_k]
+        return np.maximum(hamming_sims, (cosine_sims + 1) / 2)
     
-    def search_by_concepts(self, concepts: List[str], top_k: int = 5) -> List[Dict]:
-        """Search by specific concepts"""
-        matching_keys = set()
+    def score_rows(self, query_vector: np.ndarray, rows: np.ndarray,
+                   snapshot: Optional[StoreSnapshot] = None) -> np.ndarray:
+        """Similarity scores of the query to selected matrix rows only"""
+        snapshot = snapshot or self._snapshot
+        if len(rows) == 0:
+            return np.zeros(0)
+        return self._score_rows(snapshot, query_vector, np.asarray(rows))
+    
+    def _rank_rows(self, snapshot: StoreSnapshot, query_vector: np.ndarray, rows: Optional[np.ndarray],
+                   top_k: int, threshold: float) -> List[Tuple[str, float, Dict]]:
+        """Score the given matrix rows (None = all) and return the top_k above threshold"""
+        if rows is None:
+            if not snapshot.keys:
+                return []
+            scores = self._score_rows(snapshot, query_vector)
+            rows = np.arange(len(scores))
+        elif len(rows) == 0:
+            return []
+        else:
+            scores = self._score_rows(snapshot, query_vector, rows)
         
-        for concept in concepts:
-            if concept in self.concept_index:
-                matching_keys.update(self.concept_index[concept])
+        # Sort by similarity (stable, so ties keep insertion order) and return top_k
+        order = np.argsort(-scores, kind='stable')
         
         results = []
-        for key in matching_keys:
-            if key in self.metadata:
-                metadata = self.metadata[key].copy()
-                metadata['key'] = key
-                results.append(metadata)
+        for i in order:
+            if scores[i] < threshold or len(results) >= top_k:
+                break
+            key = snapshot.keys[rows[i]]
+            results.append((key, float(scores[i]), snapshot.metadata.get(key, {})))
+        
+        return results
+    
+    def search_similar(self, query_vector: np.ndarray, top_k: int = 5, 
+                      threshold: float = 0.1, topic: Optional[str] = None,
+                      difficulty: Optional[str] = None,
+                      concepts: Optional[List[str]] = None,
+                      early_stop: bool = False) -> List[Tuple[str, float, Dict]]:
+        """Search for similar vectors with improved threshold
+        
+        topic, difficulty and concepts (any of) filter items before scoring,
+        so filtered searches only score the matching rows. With early_stop,
+        bipolar stores are scored in dimension chunks and items that can no
+        longer reach the threshold or the top_k are dropped; results are the same.
+        """
+        snapshot = self._snapshot
+        rows = snapshot.filter_rows(topic, difficulty, concepts)  # None: score every row
+        num_rows = len(snapshot.keys) if rows is None else len(rows)
+        
+        if early_stop and snapshot.bipolar and num_rows > top_k \
+                and len(query_vector) == self.hdc.dim and np.all(np.abs(query_vector) == 1):
+            # For +/-1 vectors both similarities equal matches / dim, so the
+            # bounds on match counts bound the score; survivors are rescored exactly
+            matrix = snapshot.matrix if rows is None else snapshot.matrix[rows]
+            survivors, _ = bounded_match_counts(query_vector, matrix, threshold * self.hdc.dim - 0.5, top_k)
+            rows = survivors if rows is None else rows[survivors]
+        
+        return self._rank_rows(snapshot, query_vector, rows, top_k, threshold)
+    
+    def search_cascade(self, query_vector: np.ndarray, top_k: int = 5, threshold: float = 0.1,
+                       prefilter_dims: int = 1000, rerank_size: int = 50, topic: Optional[str] = None,
+                       difficulty: Optional[str] = None,
+                       concepts: Optional[List[str]] = None) -> List[Tuple[str, float, Dict]]:
+        """Cheap prefilter on the first prefilter_dims dimensions, then full rerank
+        
+        Random hypervectors spread similarity evenly over all dimensions, so a
+        prefix already orders items close to the full-dimension ranking.
+        Filters work as in search_similar.
+        """
+        snapshot = self._snapshot
+        rows = snapshot.filter_rows(topic, difficulty, concepts)
+        unfiltered = rows is None
+        if unfiltered:
+            rows = np.arange(len(snapshot.keys))
         
-        return results[:top_k]
+        rerank_size = max(rerank_size, top_k)
+        if len(rows) <= rerank_size:
+            return self._rank_rows(snapshot, query_vector, rows, top_k, threshold)
+        
+        # Stage 1: partial dot products on a dimension prefix (a view when unfiltered)
+        prefix = min(prefilter_dims, self.hdc.dim)
+        prefix_matrix = snapshot.matrix[:, :prefix] if unfiltered else snapshot.matrix[rows, :prefix]
+        coarse_scores = self.hdc.batch_dot(query_vector[:prefix], prefix_matrix)
+        shortlist = np.argpartition(-coarse_scores, rerank_size - 1)[:rerank_size]
+        
+        # Stage 2: exact scores for the shortlist only
+        return self._rank_rows(snapshot, query_vector, rows[np.sort(shortlist)], top_k, threshold)
+    
+    def rank_topics(self, query_vector: np.ndarray, snapshot: Optional[StoreSnapshot] = None) -> List[Tuple[str, float]]:
+        """Rank topic partitions by similarity of their prototype to the query"""
+        snapshot = snapshot or self._snapshot
+        
+        ranked = [(topic, self._score(query_vector, prototype))
+                  for topic, prototype in snapshot.topic_prototypes.items()]
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return ranked
     
-    def search_by_topic(self, topic: str) -> List[Dict]:
-        """Search by topic"""
-        if topic not in self.topic_index:
+    def search_hierarchical(self, query_vector: np.ndarray, top_k: int = 5,
+                            threshold: float = 0.1, top_topics: int = 2) -> List[Tuple[str, float, Dict]]:
+        """Two-stage search: pick the closest topic partitions, then scan only those"""
+        snapshot = self._snapshot
+        ranked_topics = self.rank_topics(query_vector, snapshot)
+        if not ranked_topics:
             return []
         
-        results = []
-        for key in self.topic_index[topic]:
-            if key in self.metadata:
-                metadata = self.metadata[key].copy()
-                metadata['key'] = key
-                results.append(metadata)
+        candidate_keys = []
+        for topic, _ in ranked_topics[:top_topics]:
+            candidate_keys.extend(snapshot.topic_index.get(topic, []))
         
-        return results
+        return self._rank_rows(snapshot, query_vector, snapshot.rows_for_keys(candidate_keys), top_k, threshold)
     
-    def create_query_vector(self, query: str) -> np.ndarray:
-        """Create HDC vector for a query with improved encoding"""
-        query_tokens = query.lower().split()
+    def search_by_concepts(self, concepts: List[str], top_k: int = 5, match_all: bool = False,
+                           topics: Optional[List[str]] = None) -> List[ItemRecord]:
+        """Search by specific concepts, most matched concepts first
+        
+        Concepts are OR-ed, or AND-ed with match_all; topics restricts results
+        to items in any of the given topics. Ties keep insertion order.
+        Records are shared - copy() before modifying.
+        """
+        snapshot = self._snapshot
+        if not concepts:
+            return []
         
-        # Clean tokens
-        cleaned_tokens = []
-        for token in query_tokens:
-            # Remove punctuation and keep only alphabetic characters
-            clean_token = ''.join(c for c in token if c.isalpha())
-            if len(clean_token) > 2:  # Only keep tokens longer than 2 characters
-                cleaned_tokens.append(clean_token)
+        rows, counts = snapshot.match_rows(concepts, topics, match_all)
+        order = np.lexsort((rows, -counts))[:top_k]
         
+        return [snapshot.records[row] for row in rows[order] if snapshot.records[row] is not None]
+    
+    def search_by_topic(self, topic: str) -> List[ItemRecord]:
+        """Search by topic (records are shared - copy() before modifying)"""
+        snapshot = self._snapshot
+        rows = snapshot.topic_postings.get(topic)
+        if rows is None:
+            return []
+        
+        return [snapshot.records[row] for row in rows if snapshot.records[row] is not None]
+    
+    def create_query_vector(self, query: str) -> np.ndarray:
+        """Create HDC vector for a query with improved encoding"""
+        cleaned_tokens = tokenize(query)
         if not cleaned_tokens:
             cleaned_tokens = ['general', 'query']  # Fallback
         
-        return self.hdc.encode_sequence(cleaned_tokens)
+        # Queries that clean to the same tokens share one cached, read-only encoding
+        cache_key = tuple(cleaned_tokens)
+        with self._query_cache_lock:
+            vector = self._query_cache.get(cache_key)
+            if vector is not None:
+                self._query_cache.move_to_end(cache_key)
+                return vector
+        
+        vector = self.hdc.encode_sequence(cleaned_tokens)
+        vector.flags.writeable = False
+        
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = vector
+            self._query_cache.move_to_end(cache_key)
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        
+        return vector
     
     def get_stats(self) -> Dict[str, Any]:
         """Get storage statistics"""
+        snapshot = self._snapshot
         return {
-            'total_vectors': len(self.vectors),
-            'total_concepts': len(self.concept_index),
-            'total_topics': len(self.topic_index),
-            'topics': list(self.topic_index.keys()),
-            'top_concepts': sorted(self.concept_index.keys())[:20]
+            'total_vectors': len(snapshot.vectors),
+            'total_concepts': len(snapshot.concept_index),
+            'total_topics': len(snapshot.topic_index),
+            'topics': list(snapshot.topic_index.keys()),
+            'top_concepts': sorted(snapshot.concept_index.keys())[:20],
+            'vector_dtype': str(snapshot.matrix.dtype),
+            'vector_bytes': int(snapshot.matrix.nbytes)
         }
     
     def save_storage(self):
-        """Save vector store to disk"""
+        """Save vector store to disk
+        
+        Both files are written to a temporary path and renamed into place, so
+        readers see either the old or the new version of each. With
+        mmap_vectors the matrix is replaced first and the pickle records the
+        identity of that .npy file; load_storage rejects a pair that does not
+        match.
+        """
         try:
+            snapshot = self._snapshot
+            # Records are saved as plain dicts so the file format stays stable
             storage_data = {
-                'vectors': self.vectors,
-                'metadata': self.metadata,
-                'concept_index': self.concept_index,
-                'topic_index': self.topic_index
+                'metadata': {key: record.copy() for key, record in snapshot.metadata.items()},
+                'concept_index': {concept: list(keys) for concept, keys in snapshot.concept_index.items()},
+                'topic_index': {topic: list(keys) for topic, keys in snapshot.topic_index.items()}
             }
             
-            with open(self.storage_path, 'wb') as f:
+            if self.mmap_vectors:
+                # Write then rename, so processes mapping the old file keep a valid view
+                tmp_path = self.matrix_path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(snapshot.matrix))
+                os.replace(tmp_path, self.matrix_path)
+                storage_data['vector_keys'] = snapshot.keys
+                storage_data['matrix_file'] = _file_identity(self.matrix_path)
+            else:
+                storage_data['vectors'] = dict(snapshot.vectors)
+            
+            tmp_path = self.storage_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
                 pickle.dump(storage_data, f)
+            os.replace(tmp_path, self.storage_path)
                 
         except Exception as e:
             print(f"Error saving storage: {e}")
     
+    def _read_storage(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray], Optional[np.ndarray]]:
+        """Read the pickle and, for mmap stores, map the matrix saved with it
+        
+        Raises ValueError when the .npy on disk is not the one the pickle was
+        saved with (another process is between its two renames).
+        """
+        with open(self.storage_path, 'rb') as f:
+            storage_data = pickle.load(f)
+        
+        # Stores saved with mmap_vectors keep only the key order in the pickle
+        if 'vector_keys' not in storage_data:
+            vectors = {key: compact_vector(vector, self.vector_dtype)
+                       for key, vector in storage_data.get('vectors', {}).items()}
+            return storage_data, vectors, None
+        
+        keys = storage_data['vector_keys']
+        vectors, matrix = self._map_vectors(keys)
+        # Checked after mapping: a file replaced in between never matches
+        expected = storage_data.get('matrix_file')
+        if len(matrix) != len(keys) or (expected is not None and _file_identity(self.matrix_path) != expected):
+            raise ValueError(f"{self.matrix_path} does not match {self.storage_path}")
+        return storage_data, vectors, matrix
+    
     def load_storage(self):
         """Load vector store from disk"""
         try:
             if os.path.exists(self.storage_path):
-                with open(self.storage_path, 'rb') as f:
-                    storage_data = pickle.load(f)
+                for attempt in range(LOAD_ATTEMPTS):
+                    try:
+                        storage_data, vectors, matrix = self._read_storage()
+                        break
+                    except ValueError as e:
+                        if attempt == LOAD_ATTEMPTS - 1:
+                            raise
+                        print(f"{e}, retrying")
+                        time.sleep(LOAD_RETRY_DELAY)
                 
-                self.vectors = storage_data.get('vectors', {})
-                self.metadata = storage_data.get('metadata', {})
-                self.concept_index = storage_data.get('concept_index', {})
-                self.topic_index = storage_data.get('topic_index', {})
+                metadata = {key: ItemRecord.from_item(key, item)
+                            for key, item in storage_data.get('metadata', {}).items()}
+                
+                with self._write_lock:
+                    self._publish(vectors,
+                                  metadata,
+                                  storage_data.get('concept_index', {}),
+                                  storage_data.get('topic_index', {}),
+                                  matrix=matrix)
                 
                 print(f"Loaded {len(self.vectors)} vectors from storage")
                 
@@ -226,12 +712,11 @@ class VectorStore:
     
     def clear_storage(self):
         """Clear all stored data"""
-        self.vectors.clear()
-        self.metadata.clear()
-        self.concept_index.clear()
-        self.topic_index.clear()
-        
-        if os.path.exists(self.storage_path):
-            os.remove(self.storage_path)
+        with self._write_lock:
+            self._publish({}, {}, {}, {})
+            
+            for path in (self.storage_path, self.matrix_path):
+                if os.path.exists(path):
+                    os.remove(path)
         
         print("Storage cleared")
\ No newline at end of file